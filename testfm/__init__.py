@@ -21,6 +21,17 @@ settings = Dynaconf(
             "subscription.capsule_dogfood_activationkey",
             "subscription.dogfood_url",
             must_exist=True,
-        )
+        ),
+        Validator(
+            "foreman.username",
+            "foreman.password",
+            must_exist=True,
+            messages={
+                "must_exist_true": (
+                    "{name} is required by the Foreman API client of fixtures, "
+                    "there are no default credentials"
+                )
+            },
+        ),
     ],
 )
@@ -40,12 +40,10 @@ class Advanced(Base):
     def run_service_restart(cls, options=None):
         """Build satellite-maintain advanced procedure run service-restart"""
 
-        cls.command_sub = "service-restart"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "service-restart")
 
         return result
 
@@ -53,12 +51,10 @@ class Advanced(Base):
     def run_katello_service_stop(cls, options=None):
         """Build satellite-maintain advanced procedure run service-stop"""
 
-        cls.command_sub = "service-stop"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "service-stop")
 
         return result
 
@@ -66,12 +62,10 @@ class Advanced(Base):
     def run_service_start(cls, options=None):
         """Build satellite-maintain advanced procedure run service-start"""
 
-        cls.command_sub = "service-start"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "service-start")
 
         return result
 
@@ -79,12 +73,10 @@ class Advanced(Base):
     def run_packages_update(cls, options=None):
         """Build satellite-maintain advanced procedure run packages-update"""
 
-        cls.command_sub = "packages-update"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "packages-update")
 
         return result
 
@@ -92,12 +84,10 @@ class Advanced(Base):
     def run_disable_maintenance_mode(cls, options=None):
         """Build satellite-maintain advanced procedure run maintenance-mode-disable"""
 
-        cls.command_sub = "maintenance-mode-disable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "maintenance-mode-disable")
 
         return result
 
@@ -105,12 +95,10 @@ class Advanced(Base):
     def run_enable_maintenance_mode(cls, options=None):
         """Build satellite-maintain advanced procedure run maintenance-mode-enable"""
 
-        cls.command_sub = "maintenance-mode-enable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "maintenance-mode-enable")
 
         return result
 
@@ -118,12 +106,10 @@ class Advanced(Base):
     def run_foreman_tasks_delete(cls, options=None):
         """Build satellite-maintain advanced procedure run foreman-tasks-delete"""
 
-        cls.command_sub = "foreman-tasks-delete"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "foreman-tasks-delete")
 
         return result
 
@@ -131,12 +117,10 @@ class Advanced(Base):
     def run_foreman_tasks_resume(cls, options=None):
         """Build satellite-maintain advanced procedure run foreman-tasks-resume"""
 
-        cls.command_sub = "foreman-tasks-resume"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "foreman-tasks-resume")
 
         return result
 
@@ -144,12 +128,10 @@ class Advanced(Base):
     def run_sync_plans_enable(cls, options=None):
         """Build satellite-maintain advanced procedure run sync-plans-enable"""
 
-        cls.command_sub = "sync-plans-enable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "sync-plans-enable")
 
         return result
 
@@ -157,12 +139,10 @@ class Advanced(Base):
     def run_sync_plans_disable(cls, options=None):
         """Build satellite-maintain advanced procedure run sync-plans-disable"""
 
-        cls.command_sub = "sync-plans-disable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "sync-plans-disable")
 
         return result
 
@@ -170,12 +150,10 @@ class Advanced(Base):
     def run_foreman_tasks_ui_investigate(cls, options=None):
         """Build satellite-maintain advanced procedure run foreman-tasks-ui-investigate"""
 
-        cls.command_sub = "foreman-tasks-ui-investigate"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "foreman-tasks-ui-investigate")
 
         return result
 
@@ -183,12 +161,10 @@ class Advanced(Base):
     def run_hammer_setup(cls, options=None):
         """Build satellite-maintain advanced procedure run hammer-setup"""
 
-        cls.command_sub = "hammer-setup"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "hammer-setup")
 
         return result
 
@@ -196,11 +172,9 @@ class Advanced(Base):
     def run_repositories_setup(cls, options=None):
         """Build satellite-maintain advanced procedure run repositories-setup"""
 
-        cls.command_sub = "repositories-setup"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "repositories-setup")
 
         return result
@@ -29,12 +29,10 @@ class AdvancedByTag(Base):
     def post_migrations(cls, options=None):
         """Build satellite-maintain advanced procedure by-tag post-migrations"""
 
-        cls.command_sub = "post-migrations"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "post-migrations")
 
         return result
 
@@ -42,12 +40,10 @@ class AdvancedByTag(Base):
     def pre_migrations(cls, options=None):
         """Build satellite-maintain advanced procedure by-tag pre-migrations"""
 
-        cls.command_sub = "pre-migrations"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "pre-migrations")
 
         return result
 
@@ -55,11 +51,9 @@ class AdvancedByTag(Base):
     def restore(cls, options=None):
         """Build satellite-maintain advanced procedure by-tag backup"""
 
-        cls.command_sub = "restore"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "restore")
 
         return result
@@ -1,3 +1,95 @@
+from typing import NamedTuple
+
+from testfm import schema
+
+
+class CommandSpec(NamedTuple):
+    """Immutable description of a single satellite-maintain invocation
+
+    :param str base: base command, like ``health`` or ``advanced procedure run``
+    :param str sub: subcommand, like ``check``
+    :param tuple options: frozen options, ``(key, value)`` pairs for options passed
+        as dict and plain strings for options passed as list
+    """
+
+    base: str
+    sub: str
+    options: tuple = ()
+
+    @classmethod
+    def from_options(cls, base, sub, options=None):
+        """Build spec from builder ``options`` given as dict or list"""
+        if options is None:
+            options = {}
+        if isinstance(options, (list, tuple)):
+            frozen = tuple(val for val in options if val is not None)
+        else:
+            frozen = tuple(
+                (key, tuple(val) if isinstance(val, list) else val)
+                for key, val in options.items()
+                if val is not None
+            )
+        return cls(base, sub, frozen)
+
+    def render(self):
+        """Return the command as shell string, option values are double quoted"""
+        tail = ""
+        for option in self.options:
+            if not isinstance(option, tuple):
+                tail += f" {option}"
+                continue
+            key, val = option
+            if val is True:
+                tail += f" --{key}"
+            elif val is not False:
+                if isinstance(val, tuple):
+                    val = ",".join(str(el) for el in val)
+                tail += f' --{key}="{val}"'
+        return f"satellite-maintain {self.base} {self.sub} {tail.strip()}"
+
+    def argv(self):
+        """Return the command as argument list, for execution without a shell"""
+        argv = ["satellite-maintain", *self.base.split()]
+        if self.sub:
+            argv.append(self.sub)
+        for option in self.options:
+            if not isinstance(option, tuple):
+                argv.append(str(option))
+                continue
+            key, val = option
+            if val is True:
+                argv.append(f"--{key}")
+            elif val is not False:
+                if isinstance(val, tuple):
+                    val = ",".join(str(el) for el in val)
+                argv.append(f"--{key}={val}")
+        return argv
+
+
+class Command(str):
+    """satellite-maintain command as shell string, carrying the :class:`CommandSpec` it came from
+
+    It works everywhere a string does. :attr:`argv` is the same command as
+    argument list for the exec paths that skip the remote shell::
+
+        ansible_module.command(argv=Health.check({"label": "server-ping"}).argv)
+        run(Health.check({"label": "server-ping"}).argv)
+    """
+
+    def __new__(cls, spec):
+        command = super().__new__(cls, spec.render())
+        command.spec = spec
+        return command
+
+    def __reduce__(self):
+        return Command, (self.spec,)
+
+    @property
+    def argv(self):
+        """Argument list of the command"""
+        return self.spec.argv()
+
+
 class Base:
     """
     @param command_base: base command of satellite-maintain.
@@ -26,28 +118,20 @@ class Base:
     """
 
     command_base = None  # each inherited instance should define this
-    command_sub = ""  # specific to instance, like: health, upgrade, etc
+    command_sub = ""  # default subcommand, for commands without one like restore
 
     @classmethod
-    def _construct_command(cls, options=None):
-        """Build a satellite-maintain command based on the options passed"""
-        tail = ""
-        if isinstance(options, list):
-            for val in options:
-                if val is None:
-                    continue
-                else:
-                    tail += f" {val}"
-        else:
-            for key, val in options.items():
-                if val is None:
-                    continue
-                if val is True:
-                    tail += f" --{key}"
-                elif val is not False:
-                    if isinstance(val, list):
-                        val = ",".join(str(el) for el in val)
-                    tail += f' --{key}="{val}"'
-
-        cmd = f"satellite-maintain {cls.command_base} {cls.command_sub} {tail.strip()}"
-        return cmd
+    def _construct_command(cls, options=None, command_sub=None):
+        """Build a satellite-maintain command based on the options passed
+
+        Builders pass their subcommand as ``command_sub``, nothing is stored on
+        the class so commands can be built from several threads at once.
+
+        :raises testfm.schema.CommandOptionError: when the command does not
+            accept an option, see :mod:`testfm.schema`
+        """
+        if command_sub is None:
+            command_sub = cls.command_sub
+        spec = CommandSpec.from_options(cls.command_base, command_sub, options)
+        schema.validate(spec, cls)
+        return Command(spec)
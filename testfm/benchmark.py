@@ -0,0 +1,233 @@
+"""Timing of individual health checks across product versions.
+
+Every label runs on its own ``health check --label`` several times, each
+round of labels is a single :func:`testfm.helpers.run_batch`. Besides the wall
+time, the step timings satellite-maintain writes to its log are fetched in the
+same batch. Results are stored in a local sqlite database keyed by the
+product version, so later runs can be compared with earlier versions::
+
+    python -m testfm.benchmark --iterations 5
+    python -m testfm.benchmark --report-only --baseline 6.11.5
+
+Checks run without ``--assumeyes``, so no remediation is done, but a check
+may still be expensive on a loaded server.
+"""
+import argparse
+import re
+import sqlite3
+import statistics
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from testfm import cache
+from testfm import catalog
+from testfm import settings
+from testfm.executor import get_executor
+from testfm.facts import host_facts
+from testfm.health import Health
+from testfm.parser import parse_checks
+
+ITERATIONS = 3
+# relative growth of the median wall time reported as regression
+THRESHOLD = 0.2
+FOREMAN_MAINTAIN_LOG = "/var/log/foreman-maintain/foreman-maintain.log"
+
+_STEP_LOG = re.compile(
+    r"\[(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?).*"
+    r"--- Execution step '.*' \[([\w-]+)\] (started|finished) ---"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL,
+    label TEXT NOT NULL,
+    started REAL,
+    wall REAL,
+    rc INTEGER
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    label TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_version_label ON runs (version, label);
+"""
+
+
+class Regression(NamedTuple):
+    """Health check whose median wall time grew
+
+    :param str label: label of the check
+    :param float baseline: median seconds on the baseline version
+    :param float current: median seconds on the current version
+    """
+
+    label: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self):
+        """Current median relative to the baseline one"""
+        return self.current / self.baseline
+
+
+def connect():
+    """Return connection to the results database kept in the local cache directory"""
+    path = cache.cache_path("benchmark.sqlite3")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path))
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def version_key(version):
+    """Return sort key of x.y.z ``version``"""
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+def _timed_check(label):
+    """Return command running check ``label`` and printing its step log lines to stderr"""
+    log = FOREMAN_MAINTAIN_LOG
+    return (
+        f"offset=$(stat -c %s {log} 2>/dev/null || echo 0); "
+        f"{Health.check({'label': label})}; rc=$?; "
+        f"tail -c +$((offset + 1)) {log} | grep -e '--- Execution step' >&2; "
+        "exit $rc"
+    )
+
+
+def _check(label):
+    return Health.check({"label": label})
+
+
+def step_durations(log_lines):
+    """Return list of ``(label, seconds)`` of steps started and finished in ``log_lines``"""
+    started = {}
+    durations = []
+    for timestamp, label, event in _STEP_LOG.findall(log_lines):
+        moment = datetime.fromisoformat(timestamp.replace(" ", "T")).timestamp()
+        if event == "started":
+            started[label] = moment
+        elif label in started:
+            durations.append((label, moment - started.pop(label)))
+    return durations
+
+
+def run_benchmark(labels=None, iterations=ITERATIONS, host=None, connection=None):
+    """Run every check of ``labels`` ``iterations`` times and store the timings
+
+    :param list labels: labels to time, all checks of the cached catalog or of
+        ``health list`` by default
+    :param int iterations: runs of every check
+    :param str host: inventory host, first host of ``server`` group by default
+    :param connection: results database, :func:`connect` by default
+    :return: version the timings are stored for
+    """
+    # imported here as helpers are not needed for reporting
+    from testfm.helpers import run
+    from testfm.helpers import run_batch
+
+    connection = connection or connect()
+    facts = host_facts(host)
+    version = facts.version
+    # the step log is read by a shell script, without a shell only wall times are stored
+    timed = _timed_check if get_executor(facts.host).shell else _check
+    if labels is None:
+        known = catalog.load(host=host)
+        if known is not None:
+            labels = known.labels
+        else:
+            labels = [check.label for check in parse_checks(run(Health.list(), host=host).stdout)]
+    for _ in range(iterations):
+        results = run_batch([timed(label) for label in labels], host=host)
+        with connection:
+            for label, result in zip(labels, results):
+                cursor = connection.execute(
+                    "INSERT INTO runs (version, label, started, wall, rc) VALUES (?, ?, ?, ?, ?)",
+                    (version, label, result.start or time.time(), result.duration, result.rc),
+                )
+                connection.executemany(
+                    "INSERT INTO steps (run, label, duration) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, *step) for step in step_durations(result.stderr)],
+                )
+    return version
+
+
+def medians(version, connection=None):
+    """Return mapping of label to median wall time of its runs on ``version``"""
+    connection = connection or connect()
+    walls = {}
+    for label, wall in connection.execute(
+        "SELECT label, wall FROM runs WHERE version = ? AND wall IS NOT NULL", (version,)
+    ):
+        walls.setdefault(label, []).append(wall)
+    return {label: statistics.median(values) for label, values in walls.items()}
+
+
+def regressions(version, baseline=None, threshold=None, connection=None):
+    """Return :class:`Regression` of checks slower on ``version`` than on ``baseline``
+
+    :param str version: version to check
+    :param str baseline: version to compare with, the newest older version stored by default
+    :param float threshold: relative growth of the median reported,
+        ``settings.benchmark.threshold`` by default
+    :return: tuple of the baseline version and list of regressions, the slowest first
+    """
+    connection = connection or connect()
+    if threshold is None:
+        threshold = settings.get("benchmark.threshold", THRESHOLD)
+    if baseline is None:
+        older = [
+            stored
+            for (stored,) in connection.execute("SELECT DISTINCT version FROM runs")
+            if version_key(stored) < version_key(version)
+        ]
+        if not older:
+            return None, []
+        baseline = max(older, key=version_key)
+    before = medians(baseline, connection)
+    found = [
+        Regression(label, before[label], current)
+        for label, current in medians(version, connection).items()
+        if before.get(label) and current > before[label] * (1 + threshold)
+    ]
+    return baseline, sorted(found, key=lambda regression: regression.ratio, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m testfm.benchmark", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--labels", help="comma-separated labels, all checks by default")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--host", help="inventory host, first host of server group by default")
+    parser.add_argument("--baseline", help="version to compare with, newest older by default")
+    parser.add_argument("--threshold", type=float, help="relative growth reported as regression")
+    parser.add_argument(
+        "--report-only", action="store_true", help="only compare timings already stored"
+    )
+    args = parser.parse_args(argv)
+    connection = connect()
+    labels = args.labels.split(",") if args.labels else None
+    if args.report_only:
+        version = host_facts(args.host).version
+    else:
+        version = run_benchmark(labels, args.iterations, args.host, connection)
+    baseline, found = regressions(version, args.baseline, args.threshold, connection)
+    if baseline is None:
+        print(f"{version}: no older version to compare with")
+        return 0
+    print(f"{version} compared with {baseline}: {len(found)} check(s) regressed")
+    for regression in found:
+        print(
+            f"  {regression.label}: {regression.baseline:.1f}s -> {regression.current:.1f}s"
+            f" (+{regression.ratio - 1:.0%})"
+        )
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+"""Local on-disk cache shared by testfm helpers.
+
+Documents are stored as JSON files under ``settings.cache.dir``
+(``~/.cache/testfm`` by default) so they survive between pytest sessions.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+from testfm import settings
+
+CACHE_DIR = "~/.cache/testfm"
+
+
+def cache_path(*parts):
+    """Return path of a cache entry, ``parts`` are joined under the cache directory"""
+    return Path(os.path.expanduser(settings.get("cache.dir", CACHE_DIR))).joinpath(*parts)
+
+
+def load(path, ttl=None):
+    """Return the document stored at ``path``.
+
+    :param path: cache entry as returned by :func:`cache_path`
+    :param ttl: maximum age of the entry in seconds, ``None`` means no expiry
+    :return: stored document or ``None`` when the entry is missing, unreadable or expired
+    """
+    try:
+        if ttl is not None and time.time() - path.stat().st_mtime > ttl:
+            return None
+        with path.open() as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def dump(path, document):
+    """Atomically store ``document`` at ``path``"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w") as handle:
+        json.dump(document, handle)
+    os.replace(tmp_path, path)
+
+
+def remove(path):
+    """Remove cache entry at ``path`` if present"""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,119 @@
+"""Catalog of health checks and tags of the installed satellite-maintain.
+
+The output of ``health list`` and ``health list-tags`` is stored in the local
+cache per rubygem-foreman_maintain version, so tests can be parametrized by
+label or tag at collection time without contacting the server. The catalog is
+collected with :func:`refresh`, e.g. by ``pytest --refresh-catalog`` or::
+
+    python -m testfm.catalog
+
+Without a cached catalog, tests parametrized by tag get :data:`DEFAULT_TAGS`
+only and :class:`CatalogWarning` is emitted.
+"""
+import warnings
+from typing import List
+from typing import NamedTuple
+
+from testfm import cache
+from testfm.facts import host_facts
+from testfm.facts import last_seen
+from testfm.health import Health
+from testfm.parser import Check
+from testfm.parser import parse_checks
+from testfm.parser import parse_tags
+
+# used when no catalog is cached for the installed version
+DEFAULT_TAGS = ("default", "pre-upgrade")
+
+
+class CatalogWarning(UserWarning):
+    """Emitted when no catalog is cached and defaults are used instead"""
+
+
+class Catalog(NamedTuple):
+    """Health checks known to a rubygem-foreman_maintain version
+
+    :param str version: rubygem-foreman_maintain package
+    :param list checks: :class:`testfm.parser.Check` records
+    :param list tags: tags of the checks
+    """
+
+    version: str
+    checks: List[Check]
+    tags: List[str]
+
+    @property
+    def labels(self):
+        """Labels of all checks"""
+        return [check.label for check in self.checks]
+
+    def tagged(self, tag):
+        """Return labels of checks tagged with ``tag``"""
+        return [check.label for check in self.checks if tag in check.tags]
+
+
+def _cache_entry(version):
+    return cache.cache_path("catalog", f"{version}.json")
+
+
+def load(version=None, host=None):
+    """Return :class:`Catalog` of ``version``, of the one installed on ``host`` by default
+
+    Only local data is used, the version is taken from the last facts cached
+    for the host even when they expired. ``None`` is returned when the version
+    or its catalog is not cached.
+
+    :param str host: inventory host, first host of ``server`` group by default
+    """
+    if version is None:
+        facts = last_seen(host)
+        version = facts and facts.foreman_maintain
+        if not version:
+            return None
+    document = cache.load(_cache_entry(version))
+    if document is None:
+        return None
+    checks = [
+        Check(label, description, tuple(tags)) for label, description, tags in document["checks"]
+    ]
+    return Catalog(version, checks, document["tags"])
+
+
+def refresh(host=None):
+    """Collect the catalog from ``host`` in one remote call and cache it
+
+    :param str host: inventory host, first host of ``server`` group by default
+    :return: the collected :class:`Catalog`
+    """
+    # imported here as helpers are not needed for reading the catalog
+    from testfm.helpers import run_batch
+
+    version = host_facts(host).foreman_maintain
+    listed, listed_tags = run_batch([Health.list(), Health.list_tags()], host=host)
+    checks = parse_checks(listed.stdout)
+    tags = parse_tags(listed_tags.stdout)
+    document = {"checks": [list(check) for check in checks], "tags": tags}
+    cache.dump(_cache_entry(version), document)
+    return Catalog(version, checks, tags)
+
+
+def tags(host=None):
+    """Return tags of the catalog cached for ``host``, :data:`DEFAULT_TAGS` when there is none
+
+    :param str host: inventory host, first host of ``server`` group by default
+    """
+    catalog = load(host=host)
+    if catalog is None or not catalog.tags:
+        warnings.warn(
+            CatalogWarning(
+                f"no health check catalog is cached, using tags {', '.join(DEFAULT_TAGS)}; "
+                "collect it with pytest --refresh-catalog"
+            )
+        )
+        return list(DEFAULT_TAGS)
+    return catalog.tags
+
+
+if __name__ == "__main__":
+    catalog = refresh()
+    print(f"{catalog.version}: {len(catalog.checks)} checks, tags: {', '.join(catalog.tags)}")
@@ -28,119 +28,185 @@ upstream_url = {
     "releases_repo": "https://yum.theforeman.org/releases/latest/el7/x86_64/",
 }
 
-# Common repositories for Satellite and Capsule
-common_repos = (
-    [
-        "rhel-7-server-rpms",
-        "rhel-server-rhscl-7-rpms",
-        "rhel-7-server-ansible-2.9-rpms",
-    ]
-    if rhel7()
-    else [
+satellite_maintain_yml = "/etc/foreman-maintain/foreman_maintain.yml"
+epel_repo = "https://dl.fedoraproject.org/pub/epel/epel-release-latest-7.noarch.rpm"
+satellite_answer_file = "/etc/foreman-installer/scenarios.d/satellite-answers.yaml"
+fm_hammer_yml = "/etc/foreman-maintain/foreman-maintain-hammer.yml"
+
+
+# Repository lists below depend on the server under test, they are resolved by
+# module level __getattr__ on first access so importing this module is free.
+
+
+def _common_repos():
+    """Common repositories for Satellite and Capsule"""
+    if rhel7():
+        return [
+            "rhel-7-server-rpms",
+            "rhel-server-rhscl-7-rpms",
+            "rhel-7-server-ansible-2.9-rpms",
+        ]
+    return [
         "rhel-8-for-x86_64-baseos-rpms",
         "rhel-8-for-x86_64-appstream-rpms",
     ]
-)
-
-# Satellite repositories
-sat_69_repos = [
-    "rhel-7-server-satellite-6.9-rpms",
-    "rhel-7-server-satellite-maintenance-6-rpms",
-] + common_repos
-
-sat_610_repos = [
-    "rhel-7-server-satellite-6.10-rpms",
-    "rhel-7-server-satellite-maintenance-6-rpms",
-] + common_repos
-
-sat_611_repos = (
-    [
-        "rhel-7-server-satellite-6.11-rpms",
-        "rhel-7-server-satellite-maintenance-6.11-rpms",
-    ]
-    if rhel7()
-    else [
-        "satellite-6.11-for-rhel-8-x86_64-rpms",
-        "satellite-maintenance-6.11-for-rhel-8-x86_64-rpms",
-    ]
-) + common_repos
-
-sat_612_repos = [
-    "satellite-6.12-for-rhel-8-x86_64-rpms",
-    "satellite-maintenance-6.12-for-rhel-8-x86_64-rpms",
-] + common_repos
-
-# Satellite Beta repositories
-sat_beta_repo = (
-    [
-        "rhel-server-7-satellite-6-beta-rpms",
-        "rhel-7-server-satellite-maintenance-6-beta-rpms",
-    ]
-    if rhel7()
-    else [
-        "satellite-6-beta-for-rhel-8-x86_64-rpms",
-    ]
-) + common_repos
-
-# Capsule repositories
-cap_69_repos = [
-    "rhel-7-server-satellite-capsule-6.9-rpms",
-    "rhel-7-server-satellite-maintenance-6-rpms",
-] + common_repos
-
-cap_610_repos = [
-    "rhel-7-server-satellite-capsule-6.10-rpms",
-    "rhel-7-server-satellite-maintenance-6-rpms",
-] + common_repos
-
-cap_611_repos = (
-    [
-        "rhel-7-server-satellite-capsule-6.11-rpms",
-        "rhel-7-server-satellite-maintenance-6.11-rpms",
-    ]
-    if rhel7()
-    else [
-        "satellite-capsule-6.11-for-rhel-8-x86_64-rpms",
-        "satellite-maintenance-6.11-for-rhel-8-x86_64-rpms",
-    ]
-) + common_repos
-
-cap_612_repos = [
-    "satellite-capsule-6.12-for-rhel-8-x86_64-rpms",
-    "satellite-maintenance-6.12-for-rhel-8-x86_64-rpms",
-] + common_repos
-
-# Capsule Beta repositories
-cap_beta_repo = (
-    [
-        "rhel-server-7-satellite-capsule-6-beta-rpms",
-        "rhel-7-server-satellite-maintenance-6-beta-rpms",
-    ]
-    if rhel7()
-    else []
-) + common_repos
-
-missing_beta_el8_repos = (
-    ["satellite-maintenance-6-beta-for-rhel-8-x86_64-rpms"]
-    if server() == "satellite"
-    else [
+
+
+def _sat_69_repos():
+    return [
+        "rhel-7-server-satellite-6.9-rpms",
+        "rhel-7-server-satellite-maintenance-6-rpms",
+    ] + _lazy("common_repos")
+
+
+def _sat_610_repos():
+    return [
+        "rhel-7-server-satellite-6.10-rpms",
+        "rhel-7-server-satellite-maintenance-6-rpms",
+    ] + _lazy("common_repos")
+
+
+def _sat_611_repos():
+    if rhel7():
+        repos = [
+            "rhel-7-server-satellite-6.11-rpms",
+            "rhel-7-server-satellite-maintenance-6.11-rpms",
+        ]
+    else:
+        repos = [
+            "satellite-6.11-for-rhel-8-x86_64-rpms",
+            "satellite-maintenance-6.11-for-rhel-8-x86_64-rpms",
+        ]
+    return repos + _lazy("common_repos")
+
+
+def _sat_612_repos():
+    return [
+        "satellite-6.12-for-rhel-8-x86_64-rpms",
+        "satellite-maintenance-6.12-for-rhel-8-x86_64-rpms",
+    ] + _lazy("common_repos")
+
+
+def _sat_beta_repo():
+    """Satellite Beta repositories"""
+    if rhel7():
+        repos = [
+            "rhel-server-7-satellite-6-beta-rpms",
+            "rhel-7-server-satellite-maintenance-6-beta-rpms",
+        ]
+    else:
+        repos = [
+            "satellite-6-beta-for-rhel-8-x86_64-rpms",
+        ]
+    return repos + _lazy("common_repos")
+
+
+def _cap_69_repos():
+    return [
+        "rhel-7-server-satellite-capsule-6.9-rpms",
+        "rhel-7-server-satellite-maintenance-6-rpms",
+    ] + _lazy("common_repos")
+
+
+def _cap_610_repos():
+    return [
+        "rhel-7-server-satellite-capsule-6.10-rpms",
+        "rhel-7-server-satellite-maintenance-6-rpms",
+    ] + _lazy("common_repos")
+
+
+def _cap_611_repos():
+    if rhel7():
+        repos = [
+            "rhel-7-server-satellite-capsule-6.11-rpms",
+            "rhel-7-server-satellite-maintenance-6.11-rpms",
+        ]
+    else:
+        repos = [
+            "satellite-capsule-6.11-for-rhel-8-x86_64-rpms",
+            "satellite-maintenance-6.11-for-rhel-8-x86_64-rpms",
+        ]
+    return repos + _lazy("common_repos")
+
+
+def _cap_612_repos():
+    return [
+        "satellite-capsule-6.12-for-rhel-8-x86_64-rpms",
+        "satellite-maintenance-6.12-for-rhel-8-x86_64-rpms",
+    ] + _lazy("common_repos")
+
+
+def _cap_beta_repo():
+    """Capsule Beta repositories"""
+    if rhel7():
+        repos = [
+            "rhel-server-7-satellite-capsule-6-beta-rpms",
+            "rhel-7-server-satellite-maintenance-6-beta-rpms",
+        ]
+    else:
+        repos = []
+    return repos + _lazy("common_repos")
+
+
+def _missing_beta_el8_repos():
+    if server() == "satellite":
+        return ["satellite-maintenance-6-beta-for-rhel-8-x86_64-rpms"]
+    return [
         "satellite-capsule-6-beta-for-rhel-8-x86_64-rpms",
         "satellite-maintenance-6-beta-for-rhel-8-x86_64-rpms",
     ]
-)
-sat_repos = {
-    "6.9": sat_69_repos,
-    "6.10": sat_610_repos,
-    "6.11": sat_611_repos,
-    "6.12": sat_612_repos,
-}
-cap_repos = {
-    "6.9": cap_69_repos,
-    "6.10": cap_610_repos,
-    "6.11": cap_611_repos,
-    "6.12": cap_612_repos,
+
+
+def _sat_repos():
+    return {
+        "6.9": _lazy("sat_69_repos"),
+        "6.10": _lazy("sat_610_repos"),
+        "6.11": _lazy("sat_611_repos"),
+        "6.12": _lazy("sat_612_repos"),
+    }
+
+
+def _cap_repos():
+    return {
+        "6.9": _lazy("cap_69_repos"),
+        "6.10": _lazy("cap_610_repos"),
+        "6.11": _lazy("cap_611_repos"),
+        "6.12": _lazy("cap_612_repos"),
+    }
+
+
+_LAZY_CONSTANTS = {
+    "common_repos": _common_repos,
+    "sat_69_repos": _sat_69_repos,
+    "sat_610_repos": _sat_610_repos,
+    "sat_611_repos": _sat_611_repos,
+    "sat_612_repos": _sat_612_repos,
+    "sat_beta_repo": _sat_beta_repo,
+    "cap_69_repos": _cap_69_repos,
+    "cap_610_repos": _cap_610_repos,
+    "cap_611_repos": _cap_611_repos,
+    "cap_612_repos": _cap_612_repos,
+    "cap_beta_repo": _cap_beta_repo,
+    "missing_beta_el8_repos": _missing_beta_el8_repos,
+    "sat_repos": _sat_repos,
+    "cap_repos": _cap_repos,
 }
-satellite_maintain_yml = "/etc/foreman-maintain/foreman_maintain.yml"
-epel_repo = "https://dl.fedoraproject.org/pub/epel/epel-release-latest-7.noarch.rpm"
-satellite_answer_file = "/etc/foreman-installer/scenarios.d/satellite-answers.yaml"
-fm_hammer_yml = "/etc/foreman-maintain/foreman-maintain-hammer.yml"
+
+
+def _lazy(name):
+    """Return value of lazy constant ``name``, computing it on first use"""
+    namespace = globals()
+    if name not in namespace:
+        namespace[name] = _LAZY_CONSTANTS[name]()
+    return namespace[name]
+
+
+def __getattr__(name):
+    """Resolve host dependent constants on first attribute access (PEP 562)"""
+    if name in _LAZY_CONSTANTS:
+        return _lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_CONSTANTS))
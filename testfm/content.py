@@ -28,12 +28,10 @@ class Content(Base):
     def prepare(cls, options=None):
         """Build satellite-maintain content prepare"""
 
-        cls.command_sub = "prepare"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "prepare")
 
         return result
 
@@ -41,12 +39,10 @@ class Content(Base):
     def prepare_abort(cls, options=None):
         """Build satellite-maintain content prepare-abort"""
 
-        cls.command_sub = "prepare-abort"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "prepare-abort")
 
         return result
 
@@ -54,12 +50,10 @@ class Content(Base):
     def migration_stats(cls, options=None):
         """Build satellite-maintain content migration-stats"""
 
-        cls.command_sub = "migration-stats"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "migration-stats")
 
         return result
 
@@ -67,12 +61,10 @@ class Content(Base):
     def migration_reset(cls, options=None):
         """Build satellite-maintain content migration-reset"""
 
-        cls.command_sub = "migration-reset"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "migration-reset")
 
         return result
 
@@ -80,11 +72,9 @@ class Content(Base):
     def remove_pulp2(cls, options=None):
         """Build satellite-maintain content remove-pulp2"""
 
-        cls.command_sub = "remove-pulp2"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "remove-pulp2")
 
         return result
@@ -26,12 +26,7 @@ def run_only_on(*server_version):
     :param str server_version: Enter '6.8', 6.7', '6.6', '6.5', '6.4' and '6.3'
     for specific version
     """
-    prd_version = product()
-    return pytest.mark.skipif(
-        prd_version not in server_version,
-        reason="Server version is '{}' and this test will run only "
-        "on '{}' version".format(prd_version, server_version),
-    )
+    return pytest.mark.run_only_on(*server_version)
 
 
 def starts_in(version):
@@ -43,18 +38,14 @@ def starts_in(version):
 
         from TestFM.decorators import starts_in
 
-        @starts_in(6.6)
+        @starts_in('6.6')
         def test_health_check():
             # test code continues here
 
-    :param float version: Enter 6.8, 6.7, 6.6, 6.5, 6.4 and 6.3
-    for specific version
+    :param str version: Enter '6.10', '6.9', '6.8', '6.7' and '6.6'
+    for specific version, as string since float 6.10 is 6.1
     """
-    return pytest.mark.skipif(
-        float(product()) < version,
-        reason="Server version is '{}' and this test will run only "
-        "on {} '{}' onward".format(product(), server(), version),
-    )
+    return pytest.mark.starts_in(version)
 
 
 def ends_in(version):
@@ -66,15 +57,66 @@ def ends_in(version):
 
         from TestFM.decorators import ends_in
 
-        @ends_in(6.6)
+        @ends_in('6.6')
         def test_health_check():
             # test code continues here
 
-    :param float version: Enter 6.7, 6.6, 6.5 , 6.4 , 6.3 , 6.2 and 6.1
-    for specific version
+    :param str version: Enter '6.10', '6.9', '6.8', '6.7' and '6.6'
+    for specific version, as string since float 6.10 is 6.1
+    """
+    return pytest.mark.ends_in(version)
+
+
+def version_tuple(version):
+    """Return x.y ``version`` as tuple of integers, so '6.10' > '6.9' compares right
+
+    :raises TypeError: when ``version`` is not a string, e.g. float 6.10 which is 6.1
+    :raises ValueError: when ``version`` is not made of dot separated numbers
     """
-    return pytest.mark.skipif(
-        float(product()) > version,
-        reason="Server version is '{}' and this test will run only "
-        "on {} <= '{}'".format(product(), server(), version),
-    )
+    if not isinstance(version, str):
+        raise TypeError(
+            f'version must be a string like "6.10", got {type(version).__name__} {version!r}'
+        )
+    return tuple(int(part) for part in version.split(".")[:2])
+
+
+def _marked_version(item, version):
+    """Return :func:`version_tuple` of ``version`` of a marker of test ``item``"""
+    try:
+        return version_tuple(version)
+    except (TypeError, ValueError) as error:
+        raise pytest.UsageError(f"invalid version marker of {item.nodeid}: {error}") from error
+
+
+def apply_version_gates(items):
+    """Skip collected ``items`` whose version markers exclude the server under test.
+
+    Called once from ``pytest_collection_modifyitems``, the server version is
+    looked up only when at least one item carries a version marker.
+    """
+    gated = [
+        item
+        for item in items
+        if any(item.get_closest_marker(name) for name in ("run_only_on", "starts_in", "ends_in"))
+    ]
+    if not gated:
+        return
+    prd_version = product()
+    current = version_tuple(prd_version)
+    for item in gated:
+        for mark in item.iter_markers("run_only_on"):
+            if current not in {_marked_version(item, version) for version in mark.args}:
+                reason = "Server version is '{}' and this test will run only on '{}' version"
+                item.add_marker(pytest.mark.skip(reason=reason.format(prd_version, mark.args)))
+        for mark in item.iter_markers("starts_in"):
+            if current < _marked_version(item, mark.args[0]):
+                reason = "Server version is '{}' and this test will run only on {} '{}' onward"
+                item.add_marker(
+                    pytest.mark.skip(reason=reason.format(prd_version, server(), mark.args[0]))
+                )
+        for mark in item.iter_markers("ends_in"):
+            if current > _marked_version(item, mark.args[0]):
+                reason = "Server version is '{}' and this test will run only on {} <= '{}'"
+                item.add_marker(
+                    pytest.mark.skip(reason=reason.format(prd_version, server(), mark.args[0]))
+                )
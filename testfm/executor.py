@@ -0,0 +1,411 @@
+"""Remote command execution backends used by :func:`testfm.helpers.run`.
+
+The backend is selected with ``settings.executor.backend``:
+
+``ssh`` (default)
+    OpenSSH with connection multiplexing. The first command opens a master
+    connection which is kept for ``settings.executor.control_persist`` seconds,
+    every later command reuses it and costs no handshake.
+``agent``
+    A small python agent started once per host over the multiplexed connection.
+    Commands are sent as JSON lines on its stdin and results are read back as
+    JSON lines from its stdout, so a command costs neither a new ssh session
+    nor a new process on the local side. Argument lists are executed directly,
+    without a remote shell.
+``ansible``
+    One ``ansible <host> -m shell`` ad-hoc run per command, slow but it honours
+    everything configured in the ansible inventory.
+``simulator``
+    No host at all, satellite-maintain commands are answered by the in-memory
+    stand-in of :mod:`testfm.simulator`.
+
+New backends are plugged in by adding an :class:`Executor` subclass to
+:data:`BACKENDS`.
+"""
+import asyncio
+import atexit
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+from testfm import settings
+from testfm.hosts import host_vars
+from testfm.hosts import inventory_path
+
+CONTROL_PATH = "~/.ssh/testfm-%C"
+CONTROL_PERSIST = 600
+REMOTE_PYTHON = "python3"
+# hosts contacted at once by fan-out helpers
+PARALLELISM = 10
+
+# Executed by the remote python of the agent backend, keep it python 3.6 compatible
+AGENT_SOURCE = """
+import json
+import subprocess
+import sys
+import time
+
+for line in sys.stdin:
+    request = json.loads(line)
+    start = time.time()
+    try:
+        proc = subprocess.run(
+            request["command"],
+            shell=isinstance(request["command"], str),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        rc, stdout, stderr = proc.returncode, proc.stdout, proc.stderr
+    except OSError as error:
+        # e.g. missing binary of an argument list, rc of the shell for "command not found"
+        rc, stdout, stderr = 127, b"", str(error).encode()
+    response = {
+        "rc": rc,
+        "stdout": stdout.decode("utf-8", "replace"),
+        "stderr": stderr.decode("utf-8", "replace"),
+        "start": start,
+        "end": time.time(),
+    }
+    sys.stdout.write(json.dumps(response) + "\\n")
+    sys.stdout.flush()
+"""
+
+ANSIBLE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class CommandResult:
+    """Outcome of a command run on a host.
+
+    Attributes can also be read by key, e.g. ``result["rc"]``, like results of
+    ``ansible_module`` calls.
+
+    :ivar str host: host the command ran on
+    :ivar int rc: exit code, ``-1`` when the command could not be run at all
+    :ivar str stdout: standard output without trailing newlines
+    :ivar str stderr: standard error without trailing newlines
+    :ivar float start: epoch time the command started
+    :ivar float end: epoch time the command finished
+    """
+
+    __slots__ = ("host", "rc", "stdout", "stderr", "start", "end")
+
+    def __init__(self, host, rc, stdout="", stderr="", start=None, end=None):
+        self.host = host
+        self.rc = rc
+        # trailing newlines are stripped the same way ansible does
+        self.stdout = stdout.rstrip("\r\n")
+        self.stderr = stderr.rstrip("\r\n")
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"<CommandResult host={self.host!r} rc={self.rc}>"
+
+    @property
+    def ok(self):
+        """True when the command exited with 0"""
+        return self.rc == 0
+
+    @property
+    def duration(self):
+        """Seconds the command ran, ``None`` when timestamps are unknown"""
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @classmethod
+    def from_ansible(cls, host, output, stderr=""):
+        """Build result from output of an ad-hoc run with the ``json`` stdout callback"""
+        try:
+            outcome = json.loads(output)["plays"][0]["tasks"][0]["hosts"][host]
+        except (ValueError, LookupError):
+            return cls(host, -1, "", output + stderr)
+        if "rc" not in outcome:
+            # unreachable host or module failure, there is no remote rc
+            return cls(host, -1, "", outcome.get("msg", ""))
+        start = end = None
+        if outcome.get("start") and outcome.get("end"):
+            start = datetime.strptime(outcome["start"], ANSIBLE_TIME_FORMAT).timestamp()
+            end = datetime.strptime(outcome["end"], ANSIBLE_TIME_FORMAT).timestamp()
+        return cls(
+            host, outcome["rc"], outcome.get("stdout", ""), outcome.get("stderr", ""), start, end
+        )
+
+
+class Executor:
+    """Runs shell commands on a single host
+
+    :cvar bool shell: commands run in a POSIX shell, so scripts work
+    """
+
+    shell = True
+
+    def __init__(self, host, user="root"):
+        self.host = host
+        self.user = user
+
+    def run(self, command):
+        """Run ``command`` on the host and return its :class:`CommandResult`
+
+        :param command: shell command string, or argument list to run without a shell
+            where the backend allows it
+        """
+        raise NotImplementedError
+
+    async def arun(self, command):
+        """Coroutine running ``command`` without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.run, command)
+
+    def http(self, send, request):
+        """Return :class:`CommandResult` of HTTP ``request`` to an API of the host
+
+        API clients like :class:`testfm.foreman.Foreman` pass their own ``send(request)``,
+        backends serving recorded results answer without calling it.
+        """
+        return send(request)
+
+    def close(self):
+        """Release resources held by the executor"""
+
+
+class ProcessExecutor(Executor):
+    """Base of executors spawning one local process per command"""
+
+    def argv(self, command):
+        """Return local command line running ``command`` on the host"""
+        raise NotImplementedError
+
+    def env(self):
+        """Return environment of the local process, ``None`` inherits the current one"""
+        return None
+
+    def result(self, returncode, stdout, stderr, start, end):
+        """Build :class:`CommandResult` from the finished local process"""
+        return CommandResult(self.host, returncode, stdout, stderr, start, end)
+
+    def run(self, command):
+        start = time.time()
+        proc = subprocess.run(
+            self.argv(command),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=self.env(),
+        )
+        return self.result(proc.returncode, proc.stdout, proc.stderr, start, time.time())
+
+    async def arun(self, command):
+        start = time.time()
+        proc = await asyncio.create_subprocess_exec(
+            *self.argv(command),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self.env(),
+        )
+        stdout, stderr = await proc.communicate()
+        return self.result(
+            proc.returncode,
+            stdout.decode("utf-8", "replace"),
+            stderr.decode("utf-8", "replace"),
+            start,
+            time.time(),
+        )
+
+
+class AnsibleExecutor(ProcessExecutor):
+    """Runs every command as an ad-hoc call of ``shell`` or, for argument lists, ``command``"""
+
+    def argv(self, command):
+        module = "shell"
+        if not isinstance(command, str):
+            # the command module splits its free-form argument itself, without a shell
+            module, command = "command", shlex.join(command)
+        return [
+            "ansible",
+            self.host,
+            "-i",
+            inventory_path(),
+            "-u",
+            self.user,
+            "-m",
+            module,
+            "-a",
+            command,
+        ]
+
+    def env(self):
+        return dict(os.environ, ANSIBLE_STDOUT_CALLBACK="json", ANSIBLE_LOAD_CALLBACK_PLUGINS="1")
+
+    def result(self, returncode, stdout, stderr, start, end):
+        return CommandResult.from_ansible(self.host, stdout, stderr)
+
+
+class SSHExecutor(ProcessExecutor):
+    """Runs commands over a multiplexed OpenSSH connection
+
+    ``ansible_host``, ``ansible_port``, ``ansible_user`` and
+    ``ansible_ssh_private_key_file`` of the host in the inventory are honoured.
+    """
+
+    def ssh_argv(self):
+        control_path = os.path.expanduser(settings.get("executor.control_path", CONTROL_PATH))
+        os.makedirs(os.path.dirname(control_path), mode=0o700, exist_ok=True)
+        variables = host_vars(self.host)
+        options = []
+        if "ansible_port" in variables:
+            options += ["-p", variables["ansible_port"]]
+        if "ansible_ssh_private_key_file" in variables:
+            options += ["-i", os.path.expanduser(variables["ansible_ssh_private_key_file"])]
+        user = variables.get("ansible_user", self.user)
+        return [
+            "ssh",
+            *options,
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ControlMaster=auto",
+            "-o",
+            f"ControlPath={control_path}",
+            "-o",
+            f"ControlPersist={settings.get('executor.control_persist', CONTROL_PERSIST)}",
+            f"{user}@{variables.get('ansible_host', self.host)}",
+        ]
+
+    def argv(self, command):
+        # ssh hands a single string to the login shell, quote argument lists safely
+        if not isinstance(command, str):
+            command = shlex.join(command)
+        return self.ssh_argv() + [command]
+
+
+class AgentExecutor(SSHExecutor):
+    """Runs commands through a persistent python agent on the host.
+
+    The agent handles one command at a time, :meth:`arun` therefore runs
+    concurrent commands as separate sessions of the multiplexed connection.
+    """
+
+    def __init__(self, host, user="root"):
+        super().__init__(host, user)
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        python = settings.get("executor.python", REMOTE_PYTHON)
+        self._process = subprocess.Popen(
+            self.ssh_argv() + [f"{python} -u -c {shlex.quote(AGENT_SOURCE)}"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1,
+        )
+
+    def _request(self, command):
+        if self._process is None or self._process.poll() is not None:
+            self._start()
+        self._process.stdin.write(json.dumps({"command": command}) + "\n")
+        self._process.stdin.flush()
+        return self._process.stdout.readline()
+
+    def run(self, command):
+        with self._lock:
+            try:
+                line = self._request(command)
+            except BrokenPipeError:
+                line = ""
+            if not line:
+                # the agent went away, e.g. dropped connection, next command starts a new one
+                self.close()
+                return CommandResult(self.host, -1, stderr="testfm agent is not running")
+        return CommandResult(self.host, **json.loads(line))
+
+    def close(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._process.wait()
+            self._process = None
+
+
+class SimulatorExecutor(Executor):
+    """Runs commands on the :class:`testfm.simulator.Simulator` of the host"""
+
+    shell = False
+
+    def run(self, command):
+        # imported here, the simulator depends on modules importing this one
+        from testfm.simulator import simulator_for
+
+        start = time.time()
+        rc, stdout, stderr = simulator_for(self.host).execute(command)
+        return CommandResult(self.host, rc, stdout, stderr, start, time.time())
+
+    async def arun(self, command):
+        # takes microseconds, a thread would cost more than the command
+        return self.run(command)
+
+
+BACKENDS = {
+    "ansible": AnsibleExecutor,
+    "ssh": SSHExecutor,
+    "agent": AgentExecutor,
+    "simulator": SimulatorExecutor,
+}
+
+_executors = {}
+_lock = threading.Lock()
+_listeners = []
+
+
+def add_listener(callback):
+    """Call ``callback(command, result, seconds)`` after every command run by the helpers
+
+    ``seconds`` is the local wall time of the call, including the round trip.
+    Used by instrumentation like :mod:`testfm.plugins.roundtrips`.
+    """
+    _listeners.append(callback)
+
+
+def remove_listener(callback):
+    """Stop calling ``callback`` registered by :func:`add_listener`"""
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def notify(command, result, seconds):
+    """Pass a finished command to every listener"""
+    for callback in list(_listeners):
+        callback(command, result, seconds)
+
+
+def get_executor(host):
+    """Return executor of the configured backend for ``host``, created once per host"""
+    backend = settings.get("executor.backend", "ssh")
+    with _lock:
+        key = (backend, host)
+        if key not in _executors:
+            _executors[key] = BACKENDS[backend](host, user=settings.get("executor.user", "root"))
+        return _executors[key]
+
+
+@atexit.register
+def close_all():
+    """Close every executor created by :func:`get_executor`"""
+    with _lock:
+        for executor in _executors.values():
+            executor.close()
+        _executors.clear()
@@ -0,0 +1,184 @@
+"""Facts about the server under test, collected with a single remote call.
+
+Facts are memoized per inventory host for the lifetime of the process and
+persisted in the local cache (see :mod:`testfm.cache`) for ``settings.facts.ttl``
+seconds, so a whole test session costs one round trip for them. Cached facts
+carry the boot ID of the host, they are checked against it by a cheap remote
+call once per process, so a reinstalled host is probed again. Expired facts
+are still served by :func:`last_seen` for purely local lookups.
+Call :func:`invalidate` after anything that changes the facts, e.g. an upgrade.
+"""
+import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from typing import Optional
+
+from testfm import cache
+from testfm import settings
+from testfm.executor import PARALLELISM
+from testfm.hosts import hosts
+
+FACTS_TTL = 3600
+# changes on every boot, so also when the host is reinstalled
+BOOT_ID_COMMAND = "cat /proc/sys/kernel/random/boot_id"
+
+# Prints one "name=value" line per fact
+FACTS_SCRIPT = (
+    "if rpm -q satellite >/dev/null 2>&1; "
+    "then echo server=satellite; echo version=$(rpm -q --qf %{VERSION} satellite); "
+    "else echo server=capsule; echo version=$(rpm -q --qf %{VERSION} satellite-capsule); fi; "
+    "echo rhel_major=$(rpm -E %rhel); "
+    "echo foreman_maintain=$(rpm -q rubygem-foreman_maintain); "
+    f"echo boot_id=$({BOOT_ID_COMMAND})"
+)
+
+_FACT_LINE = re.compile(
+    r"^(server|version|rhel_major|foreman_maintain|boot_id)=(.*)$", re.MULTILINE
+)
+
+_memo = {}
+_locks = defaultdict(threading.Lock)
+# hosts whose memoized facts come from the disk cache and were not checked yet
+_unverified = set()
+
+
+class HostFacts(NamedTuple):
+    """Facts of a single inventory host"""
+
+    host: str
+    server: Optional[str]
+    version: Optional[str]
+    rhel_major: Optional[int]
+    foreman_maintain: Optional[str]
+    boot_id: Optional[str] = None
+
+    @classmethod
+    def from_output(cls, host, output):
+        """Build facts from the output of :data:`FACTS_SCRIPT`"""
+        found = {key: value.strip() for key, value in _FACT_LINE.findall(output)}
+        rhel_major = found.get("rhel_major", "")
+        return cls(
+            host=host,
+            server=found.get("server") or None,
+            version=found.get("version") or None,
+            rhel_major=int(rhel_major) if rhel_major.isdigit() else None,
+            foreman_maintain=found.get("foreman_maintain") or None,
+            boot_id=found.get("boot_id") or None,
+        )
+
+    @property
+    def complete(self):
+        """True when the remote call succeeded and the facts are worth caching"""
+        return None not in (self.server, self.version, self.rhel_major, self.boot_id)
+
+
+def _cache_entry(host):
+    return cache.cache_path("facts", f"{host}.json")
+
+
+def _default_host():
+    return hosts("server")[0]
+
+
+def cached(host=None):
+    """Return facts of ``host`` known without any remote call, or ``None``
+
+    Facts read from the disk cache are not checked against the boot ID of the
+    host yet, :func:`host_facts` does that.
+    """
+    if host in _memo:
+        # facts of the default host are memoized under None as well, which
+        # spares resolving the host on hot paths like option validation
+        return _memo[host]
+    name = host or _default_host()
+    facts = _memo.get(name)
+    if facts is None:
+        document = cache.load(_cache_entry(name), ttl=settings.get("facts.ttl", FACTS_TTL))
+        try:
+            facts = None if document is None else HostFacts(**document)
+        except TypeError:
+            facts = None
+        if facts is None:
+            return None
+        _memo[name] = facts
+        _unverified.add(name)
+    if host is None:
+        _memo[None] = facts
+    return facts
+
+
+def last_seen(host=None):
+    """Return facts of ``host`` cached at any time, however old, or ``None``
+
+    For lookups of local data keyed by a fact, like the health check catalog,
+    which must work without a remote call after the facts expired.
+    """
+    facts = cached(host)
+    if facts is not None:
+        return facts
+    document = cache.load(_cache_entry(host or _default_host()))
+    try:
+        return None if document is None else HostFacts(**document)
+    except TypeError:
+        return None
+
+
+def host_facts(host=None):
+    """Return :class:`HostFacts` of ``host`` (first host of ``server`` group by default).
+
+    Facts are served from memory or the on-disk cache and collected from the
+    host only when neither has them or the host rebooted since they were cached.
+    Incomplete facts, e.g. of an unreachable host, are returned but not kept.
+    """
+    # imported here as helpers depend on this module for product/server/rhel7
+    from testfm.helpers import run
+
+    facts = cached(host)
+    if facts is not None and facts.host not in _unverified:
+        return facts
+    name = host or _default_host()
+    with _locks[name]:
+        facts = cached(name)
+        if facts is not None and name in _unverified:
+            if run(BOOT_ID_COMMAND, host=name).stdout.strip() == facts.boot_id:
+                _unverified.discard(name)
+            else:
+                invalidate(name)
+                facts = None
+        if facts is None:
+            facts = HostFacts.from_output(name, run(FACTS_SCRIPT, host=name).stdout)
+            if not facts.complete:
+                return facts
+            cache.dump(_cache_entry(name), facts._asdict())
+            _memo[name] = facts
+    if host is None:
+        _memo[None] = facts
+    return facts
+
+
+def group_facts(pattern="all", parallelism=None):
+    """Return mapping of host to :class:`HostFacts` for hosts matching inventory ``pattern``.
+
+    Hosts missing from the cache are contacted concurrently.
+    """
+    targets = hosts(pattern)
+    workers = parallelism or settings.get("executor.parallelism", PARALLELISM)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+        return dict(zip(targets, pool.map(host_facts, targets)))
+
+
+def invalidate(host=None):
+    """Forget cached facts of ``host``, or of every host when ``host`` is ``None``"""
+    if host is None:
+        _memo.clear()
+        _unverified.clear()
+        for entry in cache.cache_path("facts").glob("*.json"):
+            cache.remove(entry)
+    else:
+        _memo.pop(host, None)
+        _unverified.discard(host)
+        # the host may be the default one
+        _memo.pop(None, None)
+        cache.remove(_cache_entry(host))
@@ -0,0 +1,282 @@
+"""Client of the Foreman and Katello REST API for fixtures.
+
+A call is a single HTTP request, fixtures spare the Ruby startup every
+``hammer`` run pays. Connections are kept alive in a pool of
+``settings.foreman.pool_size`` connections, which is also the number of
+requests :meth:`Foreman.map` and bulk helpers like
+:meth:`Foreman.enabled_sync_plans` send at once. The client talks to the server under test, or to
+``settings.foreman.url`` when it is set, e.g. to the local stand-in of
+:mod:`testfm.foreman_simulator`::
+
+    python -m testfm.foreman_simulator --port 3000 &
+    TESTFM_FOREMAN__URL=http://localhost:3000 TESTFM_FOREMAN__USERNAME=admin \\
+        TESTFM_FOREMAN__PASSWORD=secret python -c \\
+        'from testfm.foreman import get_client; print(get_client().organizations())'
+
+There are no default credentials, ``settings.foreman.username`` and
+``settings.foreman.password`` have to be set, the settings validators require
+them at startup. Requests are handed to the executor of the server (see
+:meth:`testfm.executor.Executor.http`) and passed to the listeners of
+:func:`testfm.executor.add_listener` like commands, as
+``["foreman-api", method, path, arguments]`` with the status in ``rc``, ``0``
+when successful, and the body in ``stdout``. So they are counted, profiled and
+recorded in cassettes, and replayed without contacting Foreman.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from testfm import settings
+from testfm.executor import CommandResult
+from testfm.executor import get_executor
+from testfm.executor import notify
+from testfm.executor import PARALLELISM
+from testfm.helpers import wait_until
+from testfm.hosts import host_vars
+from testfm.hosts import hosts
+
+# records requested per page of a listing
+PER_PAGE = 1000
+TASK_TIMEOUT = 600
+
+
+class ForemanError(Exception):
+    """Raised when Foreman rejects a request
+
+    :ivar int status: HTTP status code of the response
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class Foreman:
+    """Foreman API client, settings under ``foreman`` provide the defaults
+
+    :param str url: base URL, ``https://<server host>`` by default, where the host
+        is the ``ansible_host`` of the inventory when it sets one
+    :param str username: API user, required either here or in the settings
+    :param str password: password of the API user
+    :param verify: verify TLS certificate, or path of the CA bundle
+    :param int pool_size: connections kept alive and requests sent at once
+    """
+
+    def __init__(self, url=None, username=None, password=None, verify=None, pool_size=None):
+        # requests are recorded and replayed as made on the server under test
+        self.host = hosts("server")[0]
+        address = host_vars(self.host).get("ansible_host", self.host)
+        url = url or settings.get("foreman.url") or f"https://{address}"
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+        self.session.auth = (
+            username or settings.get("foreman.username"),
+            password or settings.get("foreman.password"),
+        )
+        self.session.verify = settings.get("foreman.verify", False) if verify is None else verify
+        if self.session.verify is False:
+            # servers under test use self-signed certificates
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.session.headers["Accept"] = "application/json"
+        self.pool_size = pool_size or settings.get("foreman.pool_size", PARALLELISM)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, **kwargs):
+        """Send request to ``path`` and return its decoded JSON body
+
+        :raises ForemanError: when the response status is not successful
+        """
+        request = ["foreman-api", method, path, json.dumps(kwargs, sort_keys=True)]
+        start = time.monotonic()
+        result = get_executor(self.host).http(self.send, request)
+        notify(request, result, time.monotonic() - start)
+        if not result.ok:
+            raise ForemanError(
+                f"{method} {path} failed with {result.rc}: {result.stdout[:500]}", result.rc
+            )
+        return json.loads(result.stdout) if result.stdout else None
+
+    def send(self, request):
+        """Send ``request`` built by :meth:`request` and return the response as command result
+
+        :raises ForemanError: when the credentials are not configured
+        """
+        if None in self.session.auth:
+            raise ForemanError(
+                "Foreman credentials are not configured, set foreman.username and foreman.password"
+            )
+        _, method, path, kwargs = request
+        start = time.time()
+        response = self.session.request(method, self.url + path, **json.loads(kwargs))
+        rc = 0 if response.ok else response.status_code
+        return CommandResult(self.host, rc, response.text, "", start, time.time())
+
+    def get(self, path, **params):
+        return self.request("GET", path, params=params)
+
+    def post(self, path, payload=None):
+        return self.request("POST", path, json=payload or {})
+
+    def put(self, path, payload):
+        return self.request("PUT", path, json=payload)
+
+    def delete(self, path):
+        return self.request("DELETE", path)
+
+    def map(self, function, items):
+        """Return ``function`` applied to every item of ``items``, called concurrently
+
+        :return: list of results in order of ``items``
+        """
+        items = list(items)
+        if len(items) < 2:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(items))) as pool:
+            return list(pool.map(function, items))
+
+    def search(self, path, **params):
+        """Return every record of listing ``path``, ``params`` filter it, e.g. ``search``
+
+        Pages after the first one are fetched concurrently.
+        """
+        body = self.get(path, page=1, per_page=PER_PAGE, **params)
+        # the server may cap the page size
+        per_page = body.get("per_page") or PER_PAGE
+        pages = -(-(body.get("subtotal") or 0) // per_page)
+        rest = self.map(
+            lambda page: self.get(path, page=page, per_page=per_page, **params)["results"],
+            range(2, pages + 1),
+        )
+        return body["results"] + [record for results in rest for record in results]
+
+    def first(self, path, **params):
+        """Return first record of listing ``path`` matching ``params``
+
+        :raises ForemanError: when there is none
+        """
+        records = self.search(path, **params)
+        if not records:
+            raise ForemanError(f"nothing in {path} matches {params}", 404)
+        return records[0]
+
+    def task(self, task_id):
+        """Return foreman task ``task_id``"""
+        return self.get(f"/foreman_tasks/api/tasks/{task_id}")
+
+    def wait_for_task(self, task, timeout=TASK_TIMEOUT):
+        """Wait until ``task`` stops and return it
+
+        :raises ForemanError: when the task does not succeed
+        """
+
+        def stopped():
+            current = self.task(task["id"])
+            return current if current["state"] == "stopped" else None
+
+        task = wait_until(stopped, timeout=timeout)
+        if task["result"] != "success":
+            raise ForemanError(f"task {task['id']} ended with {task['result']}")
+        return task
+
+    def organizations(self):
+        return self.search("/api/v2/organizations")
+
+    def sync_plans(self, organization_id):
+        return self.search(f"/katello/api/v2/organizations/{organization_id}/sync_plans")
+
+    def enabled_sync_plans(self):
+        """Return enabled sync plans of all organizations, queried concurrently"""
+        plans = self.map(
+            lambda organization: self.sync_plans(organization["id"]), self.organizations()
+        )
+        return [plan for found in plans for plan in found if plan["enabled"]]
+
+    def create_sync_plan(
+        self, organization_id, name, interval="weekly", sync_date=None, enabled=True
+    ):
+        """Create sync plan in organization ``organization_id``, it starts now by default"""
+        return self.post(
+            f"/katello/api/v2/organizations/{organization_id}/sync_plans",
+            {
+                "name": name,
+                "interval": interval,
+                "sync_date": sync_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "enabled": enabled,
+            },
+        )
+
+    def product(self, organization_id, name):
+        return self.first("/katello/api/v2/products", organization_id=organization_id, name=name)
+
+    def create_product(self, organization_id, name):
+        return self.post(
+            "/katello/api/v2/products", {"organization_id": organization_id, "name": name}
+        )
+
+    def delete_product(self, product_id):
+        """Delete product ``product_id`` with its repositories and wait until it is gone"""
+        return self.wait_for_task(self.delete(f"/katello/api/v2/products/{product_id}"))
+
+    def create_repository(
+        self, product_id, name, url, content_type="yum", download_policy="immediate"
+    ):
+        return self.post(
+            "/katello/api/v2/repositories",
+            {
+                "product_id": product_id,
+                "name": name,
+                "url": url,
+                "content_type": content_type,
+                "download_policy": download_policy,
+            },
+        )
+
+    def synchronize_repository(self, repository_id, timeout=TASK_TIMEOUT):
+        """Synchronize repository ``repository_id`` and wait until the sync finishes"""
+        task = self.post(f"/katello/api/v2/repositories/{repository_id}/sync")
+        return self.wait_for_task(task, timeout)
+
+    def role(self, name):
+        return self.first("/api/v2/roles", search=f'name="{name}"')
+
+    def create_role(self, name):
+        return self.post("/api/v2/roles", {"role": {"name": name}})
+
+    def delete_role(self, role_id):
+        return self.delete(f"/api/v2/roles/{role_id}")
+
+    def create_filter(self, role_id, permissions):
+        """Add filter of ``permissions`` names to role ``role_id``"""
+        permission_ids = [
+            self.first("/api/v2/permissions", search=f'name="{name}"')["id"] for name in permissions
+        ]
+        return self.post(
+            "/api/v2/filters", {"filter": {"role_id": role_id, "permission_ids": permission_ids}}
+        )
+
+    def setting(self, name):
+        """Return value of Foreman setting ``name``"""
+        return self.get(f"/api/v2/settings/{name}")["value"]
+
+    def update_setting(self, name, value):
+        return self.put(f"/api/v2/settings/{name}", {"setting": {"value": value}})
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(url=None):
+    """Return :class:`Foreman` client of ``url``, created once per URL"""
+    with _lock:
+        if url not in _clients:
+            _clients[url] = Foreman(url)
+        return _clients[url]
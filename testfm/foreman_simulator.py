@@ -0,0 +1,443 @@
+"""Local stand-in for the parts of the Foreman and Katello API fixtures use.
+
+Organizations, sync plans, products, repositories, roles with their filters
+and permissions, settings and foreman tasks are kept in memory and served over
+HTTP in the JSON format of Foreman, so :class:`testfm.foreman.Foreman` and the
+fixture logic built on it run without any Satellite::
+
+    python -m testfm.foreman_simulator --port 3000
+
+or from python, e.g. in a fixture::
+
+    with ForemanSimulator() as simulator:
+        client = Foreman(simulator.url)
+
+Tasks, like repository synchronization, finish immediately. Any credentials
+are accepted.
+"""
+import argparse
+import json
+import re
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+# records per page when the request does not tell, as in Foreman
+PER_PAGE = 20
+PERMISSIONS = {
+    "view_hosts": "Host",
+    "console_hosts": "Host",
+    "edit_hosts": "Host",
+    "view_organizations": "Organization",
+    "view_sync_plans": "Katello::SyncPlan",
+    "view_products": "Katello::Product",
+    "view_ansible_variables": "AnsibleVariable",
+}
+SETTINGS = {
+    "token_duration": 360,
+    "foreman_tasks_sync_task_timeout": 120,
+    "outofsync_interval": 30,
+}
+
+_SEARCH_TERM = re.compile(r'(\w+)\s*=\s*"?([^"\s]*)"?')
+# query parameters filtering listings besides search
+_FILTERS = ("name", "organization_id", "product_id", "role_id")
+
+
+class SimulatorError(Exception):
+    """Error response of the simulator
+
+    :ivar int status: HTTP status code
+    :ivar dict document: JSON body of the response
+    """
+
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.document = {"error": {"message": message}}
+        if errors:
+            self.document["error"].update(errors=errors, full_messages=[message])
+
+
+def _now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def _params(body, resource):
+    """Return attributes of ``resource`` from a request ``body``, wrapped or not"""
+    wrapped = body.get(resource)
+    return wrapped if isinstance(wrapped, dict) else body
+
+
+def _matches(record, query):
+    search = query.get("search", "")
+    criteria = dict(_SEARCH_TERM.findall(search))
+    criteria.update({key: query[key] for key in _FILTERS if key in query})
+    return all(str(record.get(key)) == str(value) for key, value in criteria.items())
+
+
+def _listing(records, query):
+    """Return Foreman listing of ``records`` matching ``query``, one page of it"""
+    found = [record for record in records if _matches(record, query)]
+    page = int(query.get("page", 1))
+    per_page = int(query.get("per_page", PER_PAGE))
+    start = (page - 1) * per_page
+    end = start + per_page
+    return {
+        "total": len(records),
+        "subtotal": len(found),
+        "page": page,
+        "per_page": per_page,
+        "search": query.get("search"),
+        "results": found[start:end],
+    }
+
+
+class ForemanSimulator:
+    """In-memory Foreman served over HTTP on ``host`` and ``port``, 0 picks a free port"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.lock = threading.Lock()
+        self.records = {
+            name: {}
+            for name in (
+                "organizations",
+                "sync_plans",
+                "products",
+                "repositories",
+                "roles",
+                "filters",
+                "permissions",
+                "tasks",
+            )
+        }
+        self.settings = dict(SETTINGS)
+        self._last_id = 0
+        self.add("organizations", {"name": "Default Organization", "label": "Default_Organization"})
+        for name, resource_type in PERMISSIONS.items():
+            self.add("permissions", {"name": name, "resource_type": resource_type})
+        self.routes = [
+            ("GET", r"/api/v2/status", self.status),
+            ("GET", r"/api/v2/organizations", self.list_organizations),
+            ("POST", r"/api/v2/organizations", self.create_organization),
+            ("GET", r"/katello/api/v2/organizations/(\d+)/sync_plans", self.list_sync_plans),
+            ("POST", r"/katello/api/v2/organizations/(\d+)/sync_plans", self.create_sync_plan),
+            ("PUT", r"/katello/api/v2/organizations/(\d+)/sync_plans/(\d+)", self.update_sync_plan),
+            (
+                "DELETE",
+                r"/katello/api/v2/organizations/(\d+)/sync_plans/(\d+)",
+                self.delete_sync_plan,
+            ),
+            ("GET", r"/katello/api/v2/products", self.list_products),
+            ("POST", r"/katello/api/v2/products", self.create_product),
+            ("DELETE", r"/katello/api/v2/products/(\d+)", self.delete_product),
+            ("GET", r"/katello/api/v2/repositories", self.list_repositories),
+            ("POST", r"/katello/api/v2/repositories", self.create_repository),
+            ("POST", r"/katello/api/v2/repositories/(\d+)/sync", self.sync_repository),
+            ("GET", r"/foreman_tasks/api/tasks/([\w-]+)", self.show_task),
+            ("GET", r"/api/v2/roles", self.list_roles),
+            ("POST", r"/api/v2/roles", self.create_role),
+            ("DELETE", r"/api/v2/roles/(\d+)", self.delete_role),
+            ("GET", r"/api/v2/permissions", self.list_permissions),
+            ("GET", r"/api/v2/filters", self.list_filters),
+            ("POST", r"/api/v2/filters", self.create_filter),
+            ("GET", r"/api/v2/settings", self.list_settings),
+            ("GET", r"/api/v2/settings/(\w+)", self.show_setting),
+            ("PUT", r"/api/v2/settings/(\w+)", self.update_setting),
+        ]
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.simulator = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def dispatch(self, method, path, query, body):
+        """Return ``(status, document)`` response to a request"""
+        # Foreman serves its API with and without the version in the path
+        path = re.sub(r"^/(katello/)?api/(?!v2/)", r"/\1api/v2/", path.rstrip("/"))
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                try:
+                    with self.lock:
+                        return 200, handler(*match.groups(), query=query, body=body)
+                except SimulatorError as error:
+                    return error.status, error.document
+        return 404, {"error": {"message": f"Route {method} {path} not found"}}
+
+    def add(self, collection, record, unique_in=None):
+        """Store ``record`` with a new id and return it
+
+        :param str unique_in: attribute scoping unique names, e.g. ``organization_id``
+        :raises SimulatorError: when the name is taken
+        """
+        for other in self.records[collection].values():
+            if other.get("name") == record.get("name") and (
+                unique_in is None or other.get(unique_in) == record.get(unique_in)
+            ):
+                raise SimulatorError(
+                    422, "Validation failed: Name has already been taken", {"name": ["taken"]}
+                )
+        self._last_id += 1
+        record = dict(record, id=self._last_id, created_at=_now(), updated_at=_now())
+        self.records[collection][record["id"]] = record
+        return record
+
+    def find(self, collection, record_id):
+        """Return record ``record_id`` of ``collection``
+
+        :raises SimulatorError: when there is no such record
+        """
+        try:
+            return self.records[collection][int(record_id)]
+        except (KeyError, ValueError):
+            raise SimulatorError(
+                404, f"Resource {collection} not found by id '{record_id}'"
+            ) from None
+
+    def task(self, label, result="success"):
+        """Return a new task, finished already"""
+        task = {
+            "id": str(uuid.uuid4()),
+            "label": label,
+            "state": "stopped",
+            "result": result,
+            "started_at": _now(),
+            "ended_at": _now(),
+        }
+        self.records["tasks"][task["id"]] = task
+        return task
+
+    def status(self, query, body):
+        return {"result": "ok", "status": 200, "version": "3.9.1", "api_version": 2}
+
+    def list_organizations(self, query, body):
+        return _listing(list(self.records["organizations"].values()), query)
+
+    def create_organization(self, query, body):
+        params = _params(body, "organization")
+        return self.add(
+            "organizations", {"name": params["name"], "label": params.get("label", params["name"])}
+        )
+
+    def list_sync_plans(self, organization_id, query, body):
+        self.find("organizations", organization_id)
+        plans = [
+            plan
+            for plan in self.records["sync_plans"].values()
+            if plan["organization_id"] == int(organization_id)
+        ]
+        return _listing(plans, query)
+
+    def create_sync_plan(self, organization_id, query, body):
+        self.find("organizations", organization_id)
+        params = _params(body, "sync_plan")
+        return self.add(
+            "sync_plans",
+            {
+                "name": params["name"],
+                "organization_id": int(organization_id),
+                "interval": params.get("interval", "daily"),
+                "sync_date": params.get("sync_date", _now()),
+                "enabled": bool(params.get("enabled", False)),
+                "products": [],
+            },
+            unique_in="organization_id",
+        )
+
+    def update_sync_plan(self, organization_id, plan_id, query, body):
+        plan = self.find("sync_plans", plan_id)
+        params = _params(body, "sync_plan")
+        plan.update(
+            {
+                key: params[key]
+                for key in ("name", "interval", "sync_date", "enabled")
+                if key in params
+            },
+            updated_at=_now(),
+        )
+        return plan
+
+    def delete_sync_plan(self, organization_id, plan_id, query, body):
+        return self.records["sync_plans"].pop(self.find("sync_plans", plan_id)["id"])
+
+    def list_products(self, query, body):
+        return _listing(list(self.records["products"].values()), query)
+
+    def create_product(self, query, body):
+        params = _params(body, "product")
+        organization = self.find("organizations", params["organization_id"])
+        return self.add(
+            "products",
+            {
+                "name": params["name"],
+                "label": params.get("label", params["name"]),
+                "organization_id": organization["id"],
+                "organization": {"id": organization["id"], "name": organization["name"]},
+            },
+            unique_in="organization_id",
+        )
+
+    def delete_product(self, product_id, query, body):
+        product = self.find("products", product_id)
+        for repository in list(self.records["repositories"].values()):
+            if repository["product_id"] == product["id"]:
+                del self.records["repositories"][repository["id"]]
+        del self.records["products"][product["id"]]
+        return self.task("Actions::Katello::Product::Destroy")
+
+    def list_repositories(self, query, body):
+        return _listing(list(self.records["repositories"].values()), query)
+
+    def create_repository(self, query, body):
+        params = _params(body, "repository")
+        product = self.find("products", params["product_id"])
+        return self.add(
+            "repositories",
+            {
+                "name": params["name"],
+                "product_id": product["id"],
+                "product": {"id": product["id"], "name": product["name"]},
+                "content_type": params.get("content_type", "yum"),
+                "url": params.get("url"),
+                "download_policy": params.get("download_policy", "immediate"),
+                "last_sync": None,
+            },
+            unique_in="product_id",
+        )
+
+    def sync_repository(self, repository_id, query, body):
+        repository = self.find("repositories", repository_id)
+        task = self.task("Actions::Katello::Repository::Sync")
+        repository["last_sync"] = task
+        return task
+
+    def show_task(self, task_id, query, body):
+        if task_id not in self.records["tasks"]:
+            raise SimulatorError(404, f"Resource task not found by id '{task_id}'")
+        return self.records["tasks"][task_id]
+
+    def list_roles(self, query, body):
+        return _listing(list(self.records["roles"].values()), query)
+
+    def create_role(self, query, body):
+        return self.add("roles", {"name": _params(body, "role")["name"], "filters": []})
+
+    def delete_role(self, role_id, query, body):
+        role = self.find("roles", role_id)
+        for record in role["filters"]:
+            self.records["filters"].pop(record["id"], None)
+        return self.records["roles"].pop(role["id"])
+
+    def list_permissions(self, query, body):
+        return _listing(list(self.records["permissions"].values()), query)
+
+    def list_filters(self, query, body):
+        return _listing(list(self.records["filters"].values()), query)
+
+    def create_filter(self, query, body):
+        params = _params(body, "filter")
+        role = self.find("roles", params["role_id"])
+        permissions = [self.find("permissions", pid) for pid in params.get("permission_ids", [])]
+        record = self.add(
+            "filters",
+            {
+                "role_id": role["id"],
+                "role": {"id": role["id"], "name": role["name"]},
+                "permissions": [{"id": perm["id"], "name": perm["name"]} for perm in permissions],
+            },
+        )
+        role["filters"].append({"id": record["id"]})
+        return record
+
+    def _setting(self, name):
+        if name not in self.settings:
+            raise SimulatorError(404, f"Resource setting not found by id '{name}'")
+        return {"id": name, "name": name, "value": self.settings[name]}
+
+    def list_settings(self, query, body):
+        return _listing([self._setting(name) for name in self.settings], query)
+
+    def show_setting(self, name, query, body):
+        return self._setting(name)
+
+    def update_setting(self, name, query, body):
+        self._setting(name)
+        self.settings[name] = _params(body, "setting")["value"]
+        return self._setting(name)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Passes requests to the :class:`ForemanSimulator` of the server"""
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, do not let the body wait for an ACK
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            status, document = 400, {"error": {"message": "Invalid JSON body"}}
+        else:
+            status, document = self.server.simulator.dispatch(self.command, url.path, query, body)
+        payload = json.dumps(document).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+    def log_message(self, format, *args):
+        # keep the output of tests and benchmarks clean
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m testfm.foreman_simulator", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    args = parser.parse_args(argv)
+    simulator = ForemanSimulator(args.host, args.port)
+    print(f"Serving Foreman API stand-in on {simulator.url}, TESTFM_FOREMAN__URL={simulator.url}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
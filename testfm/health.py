@@ -43,35 +43,29 @@ class Health(Base):
                                           were already run
             -h, --help                    print help
         """
-        cls.command_sub = "check"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "check")
 
         return result
 
     @classmethod
     def list(cls, options=None):
         """Build satellite-maintain health list"""
-        cls.command_sub = "list"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "list")
 
         return result
 
     @classmethod
     def list_tags(cls, options=None):
         """Build satellite-maintain health list-tags"""
-        cls.command_sub = "list-tags"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "list-tags")
 
         return result
@@ -1,24 +1,301 @@
 # helpers required for TestFM
-import os
+import asyncio
+import hashlib
+import re
+import shlex
+import time
+from collections import Counter
+from typing import NamedTuple
 
 from testfm import settings
+from testfm.executor import CommandResult
+from testfm.executor import get_executor
+from testfm.executor import notify
+from testfm.executor import PARALLELISM
+from testfm.facts import host_facts
+from testfm.health import Health
+from testfm.hosts import hosts
+from testfm.parser import parse_checks
+from testfm.parser import parse_output
+from testfm.parser import Step
+
+# sshd allows 10 sessions per multiplexed connection by default
+CONCURRENCY = 8
+# time source of wait_until, replays of recorded runs replace it to skip the sleeping
+clock = time
 
 
 def product():
     """Use this helper to fetch x.y version of Satellite/Capsule from x.y.z.v.w"""
-    return ".".join(settings.server.version.release.split(".")[:2])
+    release = settings.get("server.version.release") or host_facts().version
+    if release is None:
+        raise RuntimeError(
+            f"version of {host_facts().host} is unknown, set server.version.release in settings"
+        )
+    return ".".join(release.split(".")[:2])
+
+
+def run(command, host=None):
+    """Use this helper to execute shell command on Satellite
+
+    :param command: shell command to run, or argument list like ``Health.check().argv``
+        to skip the remote shell where the executor allows it
+    :param str host: inventory host to run on, first host of ``server`` group by default
+    :return: :class:`testfm.executor.CommandResult` of the command
+    """
+    start = time.monotonic()
+    result = get_executor(host or hosts("server")[0]).run(command)
+    notify(command, result, time.monotonic() - start)
+    return result
+
+
+async def arun(command, host=None):
+    """Coroutine version of :func:`run`, lets independent commands overlap
+
+    Usage::
+
+        results = asyncio.run(arun_many(["hammer ping", "hammer status"]))
+    """
+    start = time.monotonic()
+    result = await get_executor(host or hosts("server")[0]).arun(command)
+    notify(command, result, time.monotonic() - start)
+    return result
+
+
+async def arun_many(commands, concurrency=CONCURRENCY, host=None):
+    """Coroutine running independent shell ``commands`` concurrently
+
+    :param list commands: shell commands or argument lists to run
+    :param int concurrency: maximum number of commands running at once
+    :param str host: inventory host to run on, first host of ``server`` group by default
+    :return: list of :class:`testfm.executor.CommandResult` in order of ``commands``
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(command):
+        async with semaphore:
+            return await arun(command, host=host)
+
+    return await asyncio.gather(*(limited(command) for command in commands))
+
+
+async def afan_out(command, pattern="capsules", parallelism=None):
+    """Coroutine running shell ``command`` on every host matching inventory ``pattern``
+
+    :param str command: shell command to run
+    :param str pattern: inventory pattern, e.g. ``capsules`` or ``satellite:capsules``
+    :param int parallelism: maximum number of hosts running the command at once,
+        ``settings.executor.parallelism`` by default
+    :return: dict of host name to :class:`testfm.executor.CommandResult`
+    """
+    targets = hosts(pattern)
+    semaphore = asyncio.Semaphore(parallelism or settings.get("executor.parallelism", PARALLELISM))
+
+    async def limited(host):
+        async with semaphore:
+            return await arun(command, host=host)
+
+    results = await asyncio.gather(*(limited(host) for host in targets))
+    return dict(zip(targets, results))
+
+
+def fan_out(command, pattern="capsules", parallelism=None):
+    """Use this helper to run shell ``command`` on a group of hosts concurrently
+
+    The call takes as long as the slowest host, see :func:`afan_out` for parameters.
+
+    Usage::
+
+        for host, result in fan_out(Health.check({"label": "services-up"})).items():
+            assert result.rc == 0, host
+    """
+    return asyncio.run(afan_out(command, pattern=pattern, parallelism=parallelism))
+
+
+def _batch_script(commands, marker):
+    """Wrap every command with start/end markers carrying its index, rc and timestamps
+
+    Markers start with a newline, so they begin a line also after output
+    without a trailing newline, that newline is not part of the output.
+    """
+    lines = []
+    for index, command in enumerate(commands):
+        lines += [
+            f'printf "%s %d start %s\\n" {marker} {index} "$(date +%s.%N)"',
+            f'printf "\\n%s %d\\n" {marker} {index} >&2',
+            "(",
+            command if isinstance(command, str) else shlex.join(command),
+            ") </dev/null",
+            "rc=$?",
+            f'printf "\\n%s %d end %d %s\\n" {marker} {index} "$rc" "$(date +%s.%N)"',
+        ]
+    return "\n".join(lines)
+
+
+def batched_commands(command):
+    """Return shell commands of script ``command`` built by :func:`run_batch`
+
+    :return: list of commands, ``None`` when ``command`` is not a batch script
+    """
+    if not isinstance(command, str) or not command.startswith('printf "%s %d start'):
+        return None
+    return re.findall(r"^\(\n(.*?)\n\) </dev/null\nrc=\$\?$", command, re.DOTALL | re.MULTILINE)
+
+
+def run_batch(commands, host=None):
+    """Use this helper to execute several independent shell commands in one remote call
+
+    Every command runs in its own subshell, so a failing command or an ``exit``
+    does not stop the following ones. Backends without a shell, like the
+    simulator, get the commands one by one instead.
+
+    :param list commands: shell commands or argument lists to run, in order
+    :param str host: inventory host to run on, first host of ``server`` group by default
+    :return: list of :class:`testfm.executor.CommandResult`, one per command
+    """
+    if not get_executor(host or hosts("server")[0]).shell:
+        return [run(command, host=host) for command in commands]
+    # derived from the commands, so the same batch is the same command line when replayed
+    digest = hashlib.sha1(repr(list(commands)).encode()).hexdigest()
+    marker = f"__testfm_{digest}__"
+    batch = run(_batch_script(commands, marker), host=host)
+    stdout_sections = {
+        int(index): (output, int(rc), float(start), float(end))
+        for index, start, output, rc, end in re.findall(
+            rf"^{marker} (\d+) start (\S+)\n(.*?)\n{marker} \1 end (-?\d+) (\S+)$",
+            batch.stdout,
+            re.DOTALL | re.MULTILINE,
+        )
+    }
+    stderr_sections = re.split(rf"(?:^|\n){marker} (\d+)(?:\n|\Z)", batch.stderr)
+    stderr_by_index = dict(zip(map(int, stderr_sections[1::2]), stderr_sections[2::2]))
+    results = []
+    for index in range(len(commands)):
+        if index not in stdout_sections:
+            # the batch died before this command finished
+            results.append(CommandResult(batch.host, -1, stderr=batch.stderr))
+            continue
+        output, rc, start, end = stdout_sections[index]
+        results.append(
+            CommandResult(batch.host, rc, output, stderr_by_index.get(index, ""), start, end)
+        )
+    return results
+
+
+def wait_until(predicate, timeout=300, interval=1, backoff=1.5, max_interval=30):
+    """Use this helper to wait for server state instead of sleeping for a fixed time
+
+    ``predicate`` is polled with intervals growing from ``interval`` by
+    ``backoff`` up to ``max_interval`` seconds, keep it cheap, e.g. a single
+    :func:`run`.
+
+    Usage::
+
+        wait_until(lambda: run("systemctl is-active foreman").stdout == "active", timeout=60)
+
+    :param predicate: function without arguments, the wait ends once it returns truthy
+    :param float timeout: seconds to give up after
+    :return: the truthy value of ``predicate``
+    :raises TimeoutError: when ``predicate`` does not hold within ``timeout``
+    """
+    deadline = clock.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value:
+            return value
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"condition not met within {timeout} seconds")
+        clock.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+class HealthCheckResult(NamedTuple):
+    """Outcome of a single health check run by :func:`run_health_checks`
+
+    :param step: :class:`testfm.parser.Step` of the check
+    :param int rc: exit code of the satellite-maintain run the check took part in,
+        0 only when the check passed
+    """
+
+    step: Step
+    rc: int
+
+
+class HealthChecks(dict):
+    """Label to :class:`HealthCheckResult` of every check :func:`run_health_checks` ran
+
+    :ivar tuple unknown: requested labels the installed satellite-maintain does not know
+    """
+
+    def __init__(self, results, unknown=()):
+        super().__init__(results)
+        self.unknown = tuple(unknown)
+
+    def __missing__(self, label):
+        if label in self.unknown:
+            raise KeyError(f"health check {label} is not known to the installed satellite-maintain")
+        raise KeyError(f"health check {label} was not requested or did not run")
+
+
+def run_health_checks(labels, host=None):
+    """Use this helper to run several read-only health checks with one satellite-maintain run
+
+    All ``labels`` are passed to a single ``health check --label`` invocation
+    next to ``health list`` in one :func:`run_batch`. The output names no
+    labels, a step belongs to the label ``health list`` prints its description
+    for. Checks whose description is shared by another requested label, and
+    all checks when the combined run fails or the installed version does not
+    take several labels at once, run in a second batch one invocation each, so
+    every check gets the rc of a run of its own.
+
+    Do not pass checks changing the system, no question is answered with yes.
+
+    Usage::
 
+        check = run_health_checks(["server-ping", "env-proxy"])["server-ping"]
+        assert check.step.status == OK
+        assert check.rc == 0
 
-def run(command):
-    """Use this helper to execute shell command on Satellite"""
-    return os.popen(f"ansible server -i testfm/inventory -u root -m shell -a '{command}'").read()
+    :param list labels: labels of the checks to run
+    :param str host: inventory host to run on, first host of ``server`` group by default
+    :return: :class:`HealthChecks` of the requested labels
+    """
+    listed, combined = run_batch(
+        [Health.list(), Health.check({"label": ",".join(labels)})], host=host
+    )
+    descriptions = {check.label: check.description for check in parse_checks(listed.stdout)}
+    known = [label for label in labels if label in descriptions]
+    shared = Counter(descriptions[label] for label in known)
+    results = {}
+    if combined.rc == 0:
+        steps = {}
+        for step in parse_output(combined.stdout).steps:
+            steps.setdefault(step.description, step)
+        for label in known:
+            description = descriptions[label]
+            if shared[description] == 1 and description in steps:
+                results[label] = HealthCheckResult(steps[description], combined.rc)
+    missing = [label for label in known if label not in results]
+    if missing:
+        separate = run_batch([Health.check({"label": label}) for label in missing], host=host)
+        for label, result in zip(missing, separate):
+            steps = parse_output(result.stdout).steps
+            # the run has checks of this label only
+            own = [step for step in steps if step.description == descriptions[label]] or steps
+            if own:
+                results[label] = HealthCheckResult(own[-1], result.rc)
+    return HealthChecks(
+        {label: results[label] for label in labels if label in results},
+        [label for label in labels if label not in descriptions],
+    )
 
 
 def server():
     """Use this to find whether server on which tests are running is capsule or satellite."""
-    return "satellite" if "rc=0" in run("rpm -q satellite") else "capsule"
+    return host_facts().server
 
 
 def rhel7():
     """Use this helper to find if satellite RHEL version is 7"""
-    return True if "rc=0" in run("rpm -qa rubygem-foreman_maintain | grep el7") else False
+    return host_facts().rhel_major == 7
@@ -0,0 +1,125 @@
+"""Local lookups in the ansible inventory used by TestFM.
+
+Hosts are resolved by reading the INI inventory directly, so addressing a host
+never costs an ansible run. Connection variables like ``ansible_host`` set for
+a host or its groups are read as well, see :func:`host_vars`. Groups used by
+TestFM:
+
+``server``
+    the host the tests run against
+``satellite`` and ``capsules``
+    the fleet, used by fan-out helpers like :func:`testfm.helpers.fan_out`
+"""
+import os
+import re
+import shlex
+from functools import lru_cache
+
+from testfm import settings
+
+INVENTORY = "testfm/inventory"
+
+
+def inventory_path():
+    """Return path of the ansible inventory, ``settings.server.inventory`` overrides default"""
+    return settings.get("server.inventory", INVENTORY)
+
+
+def _members(group, inventory, children, seen):
+    """Return hosts of ``group`` including hosts of its child groups"""
+    if group in seen:
+        return []
+    seen.add(group)
+    members = list(inventory.get(group, []))
+    for child in children.get(group, []):
+        members += _members(child, inventory, children, seen)
+    return members
+
+
+def _assignments(words):
+    """Return dict of ``key=value`` words"""
+    return dict(word.split("=", 1) for word in words if "=" in word)
+
+
+@lru_cache(maxsize=None)
+def _parse(path, mtime):
+    """Return inventory at ``path`` as group name to list of hosts and host to its variables"""
+    inventory = {}
+    children = {}
+    group_vars = {}
+    inline_vars = {}
+    group, section = "ungrouped", "hosts"
+    with open(path) as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith(";"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                group, _, section = line[1:-1].strip().partition(":")
+                section = section or "hosts"
+                if section != "vars":
+                    inventory.setdefault(group, [])
+                continue
+            if section == "hosts":
+                host, *words = shlex.split(line)
+                inventory.setdefault(group, []).append(host)
+                inline_vars.setdefault(host, {}).update(_assignments(words))
+            elif section == "children":
+                children.setdefault(group, []).append(line.split()[0])
+            elif section == "vars":
+                key, _, value = line.partition("=")
+                group_vars.setdefault(group, {})[key.strip()] = " ".join(shlex.split(value))
+    members = {
+        group: list(dict.fromkeys(_members(group, inventory, children, set())))
+        for group in inventory
+    }
+    every = list(dict.fromkeys(host for hosts in members.values() for host in hosts))
+    variables = {}
+    # variables of the host itself win over those of its groups, "all" is the weakest group
+    for group in sorted(group_vars, key=lambda name: name != "all"):
+        for host in every if group == "all" else members.get(group, []):
+            variables.setdefault(host, {}).update(group_vars[group])
+    for host, assigned in inline_vars.items():
+        variables.setdefault(host, {}).update(assigned)
+    return members, variables
+
+
+def _inventory():
+    path = inventory_path()
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return {}, {}
+    return _parse(path, mtime)
+
+
+def groups():
+    """Return mapping of inventory group name to list of hosts"""
+    return _inventory()[0]
+
+
+def host_vars(host):
+    """Return variables of inventory ``host``, e.g. ``ansible_host`` or ``ansible_port``
+
+    Variables assigned on the host line override those of ``[<group>:vars]``
+    sections, values are strings. Hosts missing from the inventory have none.
+    """
+    return dict(_inventory()[1].get(host, {}))
+
+
+def hosts(pattern="server"):
+    """Return hosts matching ``pattern``.
+
+    The pattern is ``all`` or group and host names joined with ``:`` or ``,``,
+    e.g. ``satellite:capsules``. A name which is not a group is a host name.
+    """
+    inventory = groups()
+    found = []
+    for name in re.split(r"[:,]", pattern):
+        if name == "all":
+            found += [host for members in inventory.values() for host in members]
+        elif name in inventory:
+            found += inventory[name]
+        elif name:
+            found.append(name)
+    return list(dict.fromkeys(found))
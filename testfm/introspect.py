@@ -0,0 +1,151 @@
+"""Introspection of the satellite-maintain command surface.
+
+Runs ``--help`` of every command the builders can produce in a single remote
+call, caches the parsed schema for the installed rubygem-foreman_maintain
+version (see :mod:`testfm.schema`) and reports drift against the ``--help``
+text copied into the builder docstrings.
+
+Refresh the schema for a new build and print the drift report with::
+
+    python -m testfm.introspect --refresh
+"""
+import argparse
+import importlib
+from typing import NamedTuple
+
+from testfm import schema
+from testfm.base import Base
+from testfm.facts import host_facts
+
+# modules defining the command builders
+BUILDER_MODULES = (
+    "testfm.advanced",
+    "testfm.advanced_by_tag",
+    "testfm.backup",
+    "testfm.content",
+    "testfm.health",
+    "testfm.maintenance_mode",
+    "testfm.packages",
+    "testfm.restore",
+    "testfm.service",
+    "testfm.upgrade",
+)
+
+
+class Drift(NamedTuple):
+    """Difference between a command of the installed version and its builder
+
+    :param str command: command, like ``health check``
+    :param str builder: name of the builder class
+    :param bool missing: ``--help`` of the command failed, the subcommand does not exist
+    :param tuple stale: options documented in the builder but not accepted
+    :param tuple undocumented: options accepted but not documented in the builder
+    """
+
+    command: str
+    builder: str
+    missing: bool = False
+    stale: tuple = ()
+    undocumented: tuple = ()
+
+
+def builders():
+    """Return builder classes, subclasses of :class:`testfm.base.Base` of :data:`BUILDER_MODULES`"""
+    for module in BUILDER_MODULES:
+        importlib.import_module(module)
+    return [cls for cls in Base.__subclasses__() if cls.command_base]
+
+
+def commands():
+    """Return mapping of command, like ``health check``, to the builder class producing it"""
+    found = {}
+    for builder in builders():
+        methods = [
+            getattr(builder, name)
+            for name, member in vars(builder).items()
+            if isinstance(member, classmethod) and not name.startswith("_")
+        ]
+        specs = [method().spec for method in methods] or [builder._construct_command().spec]
+        for spec in specs:
+            found.setdefault(f"{spec.base} {spec.sub}".strip(), builder)
+    return found
+
+
+def refresh(host=None, force=False):
+    """Return schema of the installed satellite-maintain, collected if not cached yet
+
+    All ``--help`` outputs are collected with a single :func:`testfm.helpers.run_batch`.
+
+    :param str host: inventory host, first host of ``server`` group by default
+    :param bool force: collect the schema even when it is cached
+    :return: tuple of rubygem-foreman_maintain version and its schema
+    """
+    # imported here as helpers are not needed for reading the cached schema
+    from testfm.helpers import run_batch
+
+    facts = host_facts(host)
+    if facts.foreman_maintain is None:
+        raise RuntimeError(f"rubygem-foreman_maintain is not installed on {facts.host}")
+    version = facts.foreman_maintain
+    cached = schema.load(version)
+    if cached and not force:
+        return version, cached
+    names = list(commands())
+    results = run_batch(
+        [["satellite-maintain", *name.split(), "--help"] for name in names], host=host
+    )
+    helps = {name: result.stdout for name, result in zip(names, results) if result.rc == 0}
+    return version, schema.save(version, helps)
+
+
+def drift(version_schema):
+    """Return list of :class:`Drift` of commands differing from their builder docstrings"""
+    report = []
+    for command, builder in sorted(commands().items()):
+        options = version_schema.get(command)
+        if options is None:
+            report.append(Drift(command, builder.__name__, missing=True))
+            continue
+        documented = schema.docstring_schema(builder).get(command)
+        if documented is None:
+            # the builder copies no --help for this command, nothing to compare
+            continue
+        stale = tuple(sorted(set(documented) - set(options)))
+        undocumented = tuple(sorted(set(options) - set(documented)))
+        if stale or undocumented:
+            report.append(Drift(command, builder.__name__, False, stale, undocumented))
+    return report
+
+
+def format_report(version, report):
+    """Return drift ``report`` as text"""
+    lines = [f"{version}: {len(report)} command(s) drifted"]
+    for item in report:
+        if item.missing:
+            lines.append(f"  {item.command} ({item.builder}): no such command")
+            continue
+        lines.append(f"  {item.command} ({item.builder}):")
+        if item.stale:
+            lines.append(f"    not accepted anymore: {' '.join(item.stale)}")
+        if item.undocumented:
+            lines.append(f"    not documented: {' '.join(item.undocumented)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m testfm.introspect", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--host", help="inventory host, first host of server group by default")
+    parser.add_argument(
+        "--refresh", action="store_true", help="collect the schema even when it is cached"
+    )
+    args = parser.parse_args(argv)
+    version, version_schema = refresh(args.host, force=args.refresh)
+    report = drift(version_schema)
+    print(format_report(version, report))
+    return 1 if report else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
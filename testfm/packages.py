@@ -41,12 +41,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "lock"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "lock")
 
         return result
 
@@ -65,12 +63,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "unlock"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "unlock")
 
         return result
 
@@ -89,12 +85,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "status"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "status")
 
         return result
 
@@ -113,12 +107,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "install"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "install")
 
         return result
 
@@ -137,12 +129,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "update"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "update")
 
         return result
 
@@ -161,12 +151,10 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "is-locked"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "is-locked")
 
         return result
 
@@ -187,10 +175,8 @@ class Packages(Base):
 
             -h, --help                    print help
         """
-        cls.command_sub = "check-update"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "check-update")
         return result
@@ -0,0 +1,191 @@
+"""Parser of satellite-maintain output.
+
+satellite-maintain prints a line per step ending with its status in brackets,
+followed by the step's messages and a separator line::
+
+    Check whether all services are running:                               [OK]
+    --------------------------------------------------------------------------------
+    Check for paused tasks:                                               [FAIL]
+    There are currently 1 paused tasks in the system
+    --------------------------------------------------------------------------------
+
+and lists labels of failed steps at the end. :class:`StepParser` turns such
+output into :class:`Step` records, ANSI color codes and spinner updates are
+dropped on the way. It works on chunks, only the current step and an
+incomplete line are kept in memory::
+
+    result = parse_output(contacted_result["stdout"])
+    assert result.ok
+    assert result.step("Check whether all services are running").status == OK
+"""
+import re
+from typing import List
+from typing import NamedTuple
+
+OK = "OK"
+FAIL = "FAIL"
+WARNING = "WARNING"
+SKIPPED = "SKIPPED"
+ABORTED = "ABORTED"
+
+# size of slices parse_output feeds, bounds the memory used on top of the output
+CHUNK_SIZE = 65536
+
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+_SEPARATOR = re.compile(r"^(?:-{10,}|={10,})$")
+_STATUS = re.compile(r"^(.*?):?\s*\[(OK|FAIL|WARNING|SKIPPED|ABORTED)\]$")
+_SUMMARY = re.compile(r"^The following steps ended up in (failing|warning) state:$")
+_LABEL = re.compile(r"^\[([\w-]+)\]$")
+_CHECK = re.compile(r"^\[([\w-]+)\]\s+(.*?)\s*((?:\[[\w-]+\]\s*)*)$")
+
+
+def strip_ansi(text):
+    """Return ``text`` without ANSI escape sequences"""
+    return _ANSI.sub("", text)
+
+
+class Step(NamedTuple):
+    """Outcome of a single satellite-maintain step
+
+    :param str description: description of the step as printed
+    :param str status: one of :data:`OK`, :data:`FAIL`, :data:`WARNING`,
+        :data:`SKIPPED` and :data:`ABORTED`
+    :param str message: lines printed by the step after its status
+    """
+
+    description: str
+    status: str
+    message: str
+
+
+class Check(NamedTuple):
+    """Health check listed by ``satellite-maintain health list``
+
+    :param str label: label of the check, like ``server-ping``
+    :param str description: description the check prints when it runs
+    :param tuple tags: tags of the check
+    """
+
+    label: str
+    description: str
+    tags: tuple
+
+
+class Scenario(NamedTuple):
+    """Steps of a whole satellite-maintain run
+
+    :param list steps: :class:`Step` records in order of execution
+    :param list failed: labels listed as ended up in failing state
+    :param list warning: labels listed as ended up in warning state
+    """
+
+    steps: List[Step]
+    failed: List[str]
+    warning: List[str]
+
+    @property
+    def ok(self):
+        """True when at least one step ran and none failed"""
+        return (
+            bool(self.steps) and not self.failed and all(step.status != FAIL for step in self.steps)
+        )
+
+    def step(self, description):
+        """Return the first step whose description starts with ``description``
+
+        :raises KeyError: when there is no such step
+        """
+        for step in self.steps:
+            if step.description.startswith(description):
+                return step
+        raise KeyError(description)
+
+
+class StepParser:
+    """Incremental parser of satellite-maintain output
+
+    Usage::
+
+        parser = StepParser()
+        for chunk in chunks:
+            for step in parser.feed(chunk):
+                ...
+        steps = list(parser.close())
+    """
+
+    def __init__(self):
+        self.failed = []
+        self.warning = []
+        self._tail = ""
+        self._current = None
+        self._summary = None
+
+    def feed(self, chunk):
+        """Parse ``chunk`` of output and yield every :class:`Step` it completes"""
+        lines = (self._tail + chunk).split("\n")
+        self._tail = lines.pop()
+        for line in lines:
+            yield from self._line(line)
+
+    def close(self):
+        """Parse the rest of the output and yield steps still pending"""
+        tail, self._tail = self._tail, ""
+        if tail:
+            yield from self._line(tail)
+        yield from self._finish()
+
+    def _finish(self):
+        if self._current is not None:
+            description, status, message = self._current
+            self._current = None
+            yield Step(description, status, "\n".join(message).strip())
+
+    def _line(self, line):
+        # spinners redraw the line after a carriage return, the last drawing wins
+        line = strip_ansi(line).rstrip("\r").rsplit("\r", 1)[-1].strip()
+        if _SEPARATOR.match(line):
+            self._summary = None
+            yield from self._finish()
+            return
+        summary = _SUMMARY.match(line)
+        if summary:
+            self._summary = self.failed if summary.group(1) == "failing" else self.warning
+            yield from self._finish()
+            return
+        label = _LABEL.match(line)
+        if self._summary is not None and label:
+            self._summary.append(label.group(1))
+            return
+        status = _STATUS.match(line)
+        if status:
+            yield from self._finish()
+            self._current = (status.group(1).strip(), status.group(2), [])
+        elif self._current is not None:
+            self._current[2].append(line)
+
+
+def parse_output(output):
+    """Parse whole satellite-maintain ``output`` into a :class:`Scenario`"""
+    parser = StepParser()
+    steps = []
+    for start in range(0, len(output), CHUNK_SIZE):
+        end = start + CHUNK_SIZE
+        steps += parser.feed(output[start:end])
+    steps += parser.close()
+    return Scenario(steps, parser.failed, parser.warning)
+
+
+def parse_tags(output):
+    """Return tags listed by ``satellite-maintain health list-tags``"""
+    return re.findall(r"^\s*\[([^\]]+)\]", strip_ansi(output), re.MULTILINE)
+
+
+def parse_checks(output):
+    """Return :class:`Check` records listed by ``satellite-maintain health list``"""
+    checks = []
+    for line in strip_ansi(output).splitlines():
+        match = _CHECK.match(line.strip())
+        if match:
+            label, description, tags = match.groups()
+            checks.append(Check(label, description, tuple(re.findall(r"\[([\w-]+)\]", tags))))
+    return checks
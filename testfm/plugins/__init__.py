@@ -0,0 +1 @@
+"""pytest plugins of TestFM, enabled by ``pytest_plugins`` in ``tests/conftest.py``"""
@@ -0,0 +1,125 @@
+"""Budgets of remote round trips and wall time.
+
+Built on :mod:`testfm.plugins.roundtrips`. The body of every test and every
+fixture set up or torn down for it get a budget of remote round trips and of
+seconds of wall time, local work and sleeps included::
+
+    @pytest.mark.budget(roundtrips=3, seconds=60)
+    def test_positive_check_server_ping(ansible_module):
+        ...
+
+Limits not given by the marker default to ``settings.budget.roundtrips`` and
+``settings.budget.seconds``, no limit applies when neither sets one. Exceeding
+a budget emits :class:`BudgetWarning`, or fails the test phase when
+``settings.budget.action`` is ``fail``.
+"""
+import time
+import warnings
+
+import pytest
+
+from testfm import settings
+from testfm.plugins.roundtrips import recorder
+
+ACTIONS = ("warn", "fail")
+
+# wall time of fixtures, (test, phase) to fixture to seconds
+_wall = {}
+
+
+class BudgetWarning(UserWarning):
+    """Emitted when a test or fixture spends more than its budget"""
+
+
+def limits(item):
+    """Return ``(roundtrips, seconds)`` budget of ``item``, ``None`` means no limit"""
+    marker = item.get_closest_marker("budget")
+    kwargs = marker.kwargs if marker else {}
+    return (
+        kwargs.get("roundtrips", settings.get("budget.roundtrips")),
+        kwargs.get("seconds", settings.get("budget.seconds")),
+    )
+
+
+def _spend(fixture, seconds):
+    """Add ``seconds`` of wall time of ``fixture`` to the running test phase"""
+    if recorder.test is None:
+        return
+    spent = _wall.setdefault((recorder.test, recorder.phase), {})
+    spent[fixture] = spent.get(fixture, 0.0) + seconds
+
+
+def overruns(item, when, duration=None):
+    """Return messages about budgets exceeded by ``item`` in phase ``when``
+
+    :param float duration: wall time of the test body, of phase ``call``
+    """
+    wall = {
+        f"fixture {fixture}": seconds
+        for fixture, seconds in _wall.pop((item.nodeid, when), {}).items()
+    }
+    if when == "call" and duration is not None:
+        wall["test"] = duration
+    max_roundtrips, max_seconds = limits(item)
+    if max_roundtrips is None and max_seconds is None:
+        return []
+    remote = {}
+    # calls of the running test are the latest ones
+    for call in reversed(recorder.calls):
+        if call.test != item.nodeid:
+            break
+        if call.phase == when:
+            name = f"fixture {call.fixture}" if call.fixture else "test"
+            roundtrips, seconds = remote.get(name, (0, 0.0))
+            remote[name] = (roundtrips + 1, seconds + call.seconds)
+    messages = []
+    for name in dict.fromkeys([*wall, *remote]):
+        roundtrips, remote_seconds = remote.get(name, (0, 0.0))
+        seconds = wall.get(name, remote_seconds)
+        if max_roundtrips is not None and roundtrips > max_roundtrips:
+            messages.append(f"{name} made {roundtrips} remote round trips, budget {max_roundtrips}")
+        if max_seconds is not None and seconds > max_seconds:
+            messages.append(
+                f"{name} took {seconds:.1f}s, {remote_seconds:.1f}s of them in remote calls, "
+                f"budget {max_seconds}s"
+            )
+    return messages
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "budget(roundtrips, seconds): remote round trips and seconds a test may spend"
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    messages = overruns(item, call.when, report.duration)
+    if not messages:
+        return
+    action = settings.get("budget.action", "warn")
+    if action not in ACTIONS:
+        raise ValueError(f"budget.action must be one of {', '.join(ACTIONS)}, not {action!r}")
+    if action == "fail" and report.passed:
+        report.outcome = "failed"
+        report.longrepr = "Budget exceeded:\n" + "\n".join(messages)
+    else:
+        for message in messages:
+            warnings.warn(BudgetWarning(f"{item.nodeid}: {message}"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    teardown = {}
+    # finalizers run in reverse order, so this one and the last one enclose the teardown
+    fixturedef.addfinalizer(
+        lambda: _spend(fixturedef.argname, time.monotonic() - teardown["start"])
+    )
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        _spend(fixturedef.argname, time.monotonic() - start)
+        fixturedef.addfinalizer(lambda: teardown.update(start=time.monotonic()))
@@ -0,0 +1,398 @@
+"""Offline record and replay of remote calls.
+
+``pytest --testfm-record`` stores every ``ansible_module`` call, every
+command run by :mod:`testfm.helpers` and every request of :mod:`testfm.foreman`
+together with its result in cassettes, JSON lines files under
+``settings.cassettes.dir`` (``tests/cassettes`` by default).
+``pytest --testfm-replay`` serves the results from the cassettes and
+contacts no host at all, e.g. to work on fixtures or output parsers locally.
+
+Every test has its own cassette, fixtures of a scope wider than ``function``
+have one shared by all tests using them, so a subset of tests replays too.
+Facts and the health check catalog are collected once at the start of the
+session into the ``_session`` cassette, the local cache (see
+:mod:`testfm.cache`) is bypassed on record and replay. Waits of
+:func:`testfm.helpers.wait_until` do not sleep on replay.
+Values of the settings listed in :data:`SECRETS` and passwords given to
+``--password`` or ``-u <user> -p`` options of commands are replaced by placeholders before
+a cassette is stored, calls are replayed by their redacted arguments.
+Calls are matched by module and arguments; a call whose arguments changed,
+e.g. a random name, gets the next unused result of the same module and shape
+(see :func:`shape`), any other call raises :class:`CassetteMiss`. Replayed
+calls still go through :mod:`testfm.plugins.roundtrips`, this plugin has to be
+listed before it in ``pytest_plugins``.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from testfm import catalog
+from testfm import executor
+from testfm import facts
+from testfm import helpers
+from testfm import settings
+from testfm.executor import add_listener
+from testfm.executor import CommandResult
+from testfm.executor import remove_listener
+
+CASSETTES_DIR = "tests/cassettes"
+# cassette of calls made outside of any test, e.g. facts collected by pytest_configure
+SESSION = "_session"
+# settings whose values never get into a cassette
+SECRETS = ("subscription.rhn_username", "subscription.rhn_password", "foreman.password")
+MIN_SECRET_LENGTH = 4
+# --password of any command, -p right after the -u user of e.g. hammer
+_PASSWORD_OPTION = re.compile(r"""((?:\s-u\s+\S+\s+-p|\s--password)[ =])('[^']*'|"[^"]*"|\S+)""")
+
+
+class CassetteMiss(LookupError):
+    """Raised on replay of a call which is not in the cassette"""
+
+
+def _key(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _scrub(value, replace):
+    """Return ``value`` with ``replace`` applied to every string in it, lists and dicts included"""
+    if isinstance(value, str):
+        return replace(value)
+    if isinstance(value, dict):
+        return {key: _scrub(item, replace) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_scrub(item, replace) for item in value]
+    return value
+
+
+def shape(value):
+    """Return what a replayed call must share with the recorded one it gets the result of
+
+    Program and number of words of every command, batched ones of
+    :func:`testfm.helpers.run_batch` included, and keys of keyword arguments.
+    """
+    if isinstance(value, str):
+        batched = helpers.batched_commands(value)
+        if batched:
+            return [shape(command) for command in batched]
+        words = value.split()
+        return [words[0] if words else "", len(words)]
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [shape(item) for item in value]
+    return value
+
+
+def redact(call):
+    """Return recorded ``call`` with secrets replaced by placeholders
+
+    Values of :data:`SECRETS` become ``<setting name>`` in arguments and result,
+    passwords of ``--password`` and ``-u <user> -p`` options become ``<password>``
+    in the arguments.
+    """
+    secrets = {}
+    for name in SECRETS:
+        value = str(settings.get(name) or "")
+        # shorter values, e.g. of a test setup, would mask unrelated text
+        if len(value) >= MIN_SECRET_LENGTH:
+            secrets[value] = f"<{name}>"
+    # one pass with the longest values first, a secret may contain another one
+    pattern = re.compile("|".join(map(re.escape, sorted(secrets, key=len, reverse=True))))
+
+    def mask(text):
+        return pattern.sub(lambda match: secrets[match.group()], text) if secrets else text
+
+    def mask_arguments(text):
+        return _PASSWORD_OPTION.sub(r"\1<password>", mask(text))
+
+    redacted = dict(call)
+    for field in ("args", "kwargs"):
+        if field in call:
+            redacted[field] = _scrub(call[field], mask_arguments)
+    if "result" in call:
+        redacted["result"] = _scrub(call["result"], mask)
+    return redacted
+
+
+def cassette_path(name):
+    """Return path of cassette ``name``, a test node id or ``<node id>::<fixture>``"""
+    name = name.replace(".py::", "/").replace("::", "/")
+    name = re.sub(r"[^\w./\[\]-]", "_", name)
+    return Path(os.path.expanduser(settings.get("cassettes.dir", CASSETTES_DIR))) / (
+        name + ".jsonl"
+    )
+
+
+class Cassette:
+    """Recorded calls of a single test or fixture
+
+    :ivar list calls: dicts with ``source`` (``ansible`` or ``helpers``), ``module``,
+        ``args``, ``kwargs`` and ``result`` of every call, in order
+    """
+
+    def __init__(self, path, calls=None):
+        self.path = path
+        self.calls = calls or []
+        self._used = set()
+
+    @classmethod
+    def load(cls, path):
+        """Return cassette stored at ``path``, empty one when there is none"""
+        try:
+            with path.open() as handle:
+                return cls(path, [json.loads(line) for line in handle if line.strip()])
+        except FileNotFoundError:
+            return cls(path)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w") as handle:
+            for call in self.calls:
+                handle.write(json.dumps(redact(call), separators=(",", ":"), default=str) + "\n")
+
+    def record(self, source, module, args, kwargs, result):
+        self.calls.append(
+            {"source": source, "module": module, "args": args, "kwargs": kwargs, "result": result}
+        )
+
+    def play(self, source, module, args, kwargs):
+        """Return result of the recorded call matching the given one
+
+        :raises CassetteMiss: when no call of ``module`` of the same shape is left
+        """
+        # recorded calls are redacted, so is the key they are looked up by
+        call = redact({"args": args, "kwargs": kwargs})
+        key = _key([call["args"], call["kwargs"]])
+        same_shape = _key(shape([call["args"], call["kwargs"]]))
+        similar = [
+            index
+            for index, recorded in enumerate(self.calls)
+            if recorded["source"] == source
+            and recorded["module"] == module
+            and _key(shape([recorded["args"], recorded["kwargs"]])) == same_shape
+        ]
+        exact = [
+            index
+            for index in similar
+            if _key([self.calls[index]["args"], self.calls[index]["kwargs"]]) == key
+        ]
+        unused = [index for index in exact if index not in self._used] or [
+            index for index in similar if index not in self._used
+        ]
+        if unused:
+            self._used.add(unused[0])
+            return self.calls[unused[0]]["result"]
+        if exact:
+            # polled more often than while recording, the state does not change any more
+            return self.calls[exact[-1]]["result"]
+        raise CassetteMiss(f"{module} {args} {kwargs} is not recorded in {self.path}")
+
+
+class ReplayedResult(dict):
+    """Replayed result of an ``ansible_module`` call, host name to module result
+
+    Mimics the ad-hoc result of pytest-ansible, e.g. ``values()`` returns a list.
+    """
+
+    @property
+    def contacted(self):
+        return dict(self)
+
+    def keys(self):
+        return list(super().keys())
+
+    def values(self):
+        return list(super().values())
+
+    def items(self):
+        return list(super().items())
+
+
+def _contacted(result):
+    """Return ad-hoc ``result`` as plain dict of host name to module result"""
+    contacted = getattr(result, "contacted", result)
+    return {host: dict(value) for host, value in contacted.items()}
+
+
+class VirtualClock:
+    """Clock of :func:`testfm.helpers.wait_until` on replay, sleeping only advances it"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Deck:
+    """Cassettes of the session and the context selecting the current one
+
+    :ivar str cache_dir: local cache used instead of the configured one on record and replay
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.test = None
+        self.fixtures = []
+        self.cassettes = {}
+        self.cache_dir = None
+
+    def cassette(self, name=None):
+        """Return cassette ``name``, the one of the running test or fixture by default"""
+        if name is None:
+            name = self.fixtures[-1] if self.fixtures else self.test or SESSION
+        if name not in self.cassettes:
+            path = cassette_path(name)
+            # recording starts every cassette from scratch
+            self.cassettes[name] = Cassette(path) if self.mode == "record" else Cassette.load(path)
+        return self.cassettes[name]
+
+    def save(self, name=None):
+        """Store recorded cassette ``name``, all of them by default"""
+        if self.mode != "record":
+            return
+        names = list(self.cassettes) if name is None else [name]
+        for cassette in [self.cassettes[name] for name in names if name in self.cassettes]:
+            cassette.save()
+
+    def on_command(self, command, result, seconds):
+        """Listener of :func:`testfm.executor.add_listener` recording helpers commands"""
+        self.cassette().record(
+            "helpers",
+            "run",
+            [command],
+            {"host": result.host},
+            {slot: result[slot] for slot in CommandResult.__slots__},
+        )
+
+
+deck = Deck()
+
+
+class CassetteExecutor(executor.Executor):
+    """Executor backend serving commands from the cassettes"""
+
+    def run(self, command):
+        result = deck.cassette().play("helpers", "run", [command], {"host": self.host})
+        return CommandResult(**result)
+
+    def http(self, send, request):
+        return self.run(request)
+
+
+class CassetteModuleDispatcher:
+    """Proxy of pytest-ansible module dispatcher recording or replaying every module call
+
+    :param dispatcher: module dispatcher of pytest-ansible, ``None`` on replay
+    """
+
+    def __init__(self, dispatcher, deck):
+        self._dispatcher = dispatcher
+        self._deck = deck
+
+    def __getattr__(self, name):
+        if self._dispatcher is not None:
+            attribute = getattr(self._dispatcher, name)
+            if name.startswith("_") or hasattr(type(self._dispatcher), name):
+                return attribute
+        elif name.startswith("_"):
+            raise AttributeError(name)
+        elif name == "has_module":
+            return lambda module: True
+
+        def module(*args, **kwargs):
+            cassette = self._deck.cassette()
+            if self._dispatcher is None:
+                return ReplayedResult(cassette.play("ansible", name, list(args), kwargs))
+            result = attribute(*args, **kwargs)
+            cassette.record("ansible", name, list(args), kwargs, _contacted(result))
+            return result
+
+        return module
+
+
+@pytest.fixture
+def ansible_module(request):
+    """``ansible_module`` recording or replaying module calls when enabled"""
+    if deck.mode == "replay":
+        return CassetteModuleDispatcher(None, deck)
+    dispatcher = request.getfixturevalue("ansible_module")
+    if deck.mode == "record":
+        return CassetteModuleDispatcher(dispatcher, deck)
+    return dispatcher
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("testfm cassettes")
+    group.addoption(
+        "--testfm-record",
+        action="store_true",
+        help="Record remote calls and their results into cassettes",
+    )
+    group.addoption(
+        "--testfm-replay",
+        action="store_true",
+        help="Serve remote calls from cassettes without contacting any host",
+    )
+
+
+def pytest_configure(config):
+    record, replay = config.getoption("testfm_record"), config.getoption("testfm_replay")
+    if record and replay:
+        raise pytest.UsageError("--testfm-record and --testfm-replay are mutually exclusive")
+    if record:
+        deck.mode = "record"
+        add_listener(deck.on_command)
+    elif replay:
+        deck.mode = "replay"
+        executor.BACKENDS["cassette"] = CassetteExecutor
+        settings.set("executor.backend", "cassette")
+        helpers.clock = VirtualClock()
+    else:
+        return
+    # a cache filled by earlier sessions would keep these calls out of the cassettes
+    deck.cache_dir = tempfile.mkdtemp(prefix="testfm-cassettes-")
+    settings.set("cache.dir", deck.cache_dir)
+    facts.invalidate()
+    # outside of any test, so recorded in the session cassette every test replays with
+    catalog.refresh()
+
+
+def pytest_unconfigure(config):
+    remove_listener(deck.on_command)
+    deck.save()
+    helpers.clock = helpers.time
+    if deck.cache_dir is not None:
+        shutil.rmtree(deck.cache_dir, ignore_errors=True)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    deck.test = item.nodeid
+    yield
+    deck.save(item.nodeid)
+    deck.test = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    if fixturedef.scope == "function":
+        yield
+        return
+    name = f"{request.node.nodeid or SESSION}::{fixturedef.argname}"
+    # same ordering of finalizers as in testfm.plugins.roundtrips
+    fixturedef.addfinalizer(deck.fixtures.pop)
+    deck.fixtures.append(name)
+    try:
+        yield
+    finally:
+        deck.fixtures.pop()
+        fixturedef.addfinalizer(lambda: deck.fixtures.append(name))
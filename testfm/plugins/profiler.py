@@ -0,0 +1,187 @@
+"""Timeline of the session down to single remote commands.
+
+Enabled by ``--profile-trace PATH`` and/or ``--profile-stacks PATH``. Spans are
+nested as session, module, test, test phase, fixture setup or finalizer and
+remote command, the remote commands come from :mod:`testfm.plugins.roundtrips`.
+
+``--profile-trace`` writes Chrome trace-event JSON, to be opened in
+``chrome://tracing`` or https://ui.perfetto.dev. ``--profile-stacks`` writes
+collapsed stacks with the self time of each span in microseconds, the input
+of ``flamegraph.pl`` or https://www.speedscope.app.
+"""
+import json
+import os
+import time
+from typing import NamedTuple
+
+import pytest
+
+from testfm.plugins.roundtrips import recorder
+
+
+class Span(NamedTuple):
+    """Timed part of the session, times are seconds of :func:`time.perf_counter`"""
+
+    name: str
+    category: str
+    start: float
+    end: float
+
+
+class Profiler:
+    """Collects spans of the session"""
+
+    def __init__(self):
+        self.spans = []
+        self._open = {}
+
+    def begin(self, key, name, category):
+        """Open span ``name`` under ``key`` identifying it until :meth:`end`"""
+        self._open[key] = (name, category, time.perf_counter())
+
+    def end(self, key):
+        """Close span opened under ``key``, nothing happens when it is not open"""
+        if key in self._open:
+            name, category, start = self._open.pop(key)
+            self.spans.append(Span(name, category, start, time.perf_counter()))
+
+    def close_all(self):
+        """Close every span still open"""
+        for key in list(self._open):
+            self.end(key)
+
+    def on_round_trip(self, call):
+        """Subscriber of :meth:`testfm.plugins.roundtrips.Recorder.subscribe`"""
+        end = time.perf_counter()
+        self.spans.append(Span(call.program, "remote", end - call.seconds, end))
+
+    def ordered(self):
+        """Return spans ordered so every span follows the spans containing it"""
+        return sorted(self.spans, key=lambda span: (span.start, -span.end))
+
+    def trace_events(self):
+        """Return the spans as Chrome trace events"""
+        origin = min((span.start for span in self.spans), default=0)
+        return [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6),
+                "dur": round((span.end - span.start) * 1e6),
+                "pid": os.getpid(),
+                "tid": 1,
+            }
+            for span in self.ordered()
+        ]
+
+    def collapsed_stacks(self):
+        """Return lines ``frame;frame;... self-microseconds`` for flame graphs"""
+        totals = {}
+        stack = []
+        for span in self.ordered():
+            while stack and span.start >= stack[-1][0].end:
+                stack.pop()
+            if stack:
+                # the time of a child is not the self time of its parent
+                stack[-1][1][0] -= span.end - span.start
+            path = ";".join([frame.name for frame, _ in stack] + [span.name])
+            own = [span.end - span.start]
+            totals.setdefault(path, []).append(own)
+            stack.append((span, own))
+        lines = []
+        for path, owns in totals.items():
+            micros = round(sum(own[0] for own in owns) * 1e6)
+            if micros > 0:
+                lines.append(f"{path} {micros}")
+        return lines
+
+
+profiler = Profiler()
+
+
+def _enabled(config):
+    return bool(config.getoption("profile_trace") or config.getoption("profile_stacks"))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("testfm profiler")
+    group.addoption("--profile-trace", metavar="PATH", help="Write Chrome trace-event JSON")
+    group.addoption(
+        "--profile-stacks", metavar="PATH", help="Write collapsed stacks for flame graphs"
+    )
+
+
+def pytest_configure(config):
+    if _enabled(config):
+        config.pluginmanager.register(ProfilerHooks(), "testfm-profiler-hooks")
+        recorder.subscribe(profiler.on_round_trip)
+
+
+class ProfilerHooks:
+    """Hooks timing the session, registered only when the profiler is enabled"""
+
+    def __init__(self):
+        self.module = None
+
+    def pytest_sessionstart(self, session):
+        profiler.begin("session", "session", "session")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item):
+        module = item.nodeid.split("::", 1)[0]
+        if module != self.module:
+            profiler.end("module")
+            profiler.begin("module", module, "module")
+            self.module = module
+        profiler.begin(("test", item.nodeid), item.name, "test")
+        yield
+        profiler.end(("test", item.nodeid))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        profiler.begin("phase", "setup", "phase")
+        yield
+        profiler.end("phase")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        profiler.begin("phase", "call", "phase")
+        yield
+        profiler.end("phase")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        profiler.begin("phase", "teardown", "phase")
+        yield
+        profiler.end("phase")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        key = ("fixture", id(fixturedef))
+        profiler.begin(key, fixturedef.argname, "fixture")
+        try:
+            yield
+        finally:
+            profiler.end(key)
+            # runs before the finalizers added during the setup, so it starts the span
+            # closed by pytest_fixture_post_finalizer
+            fixturedef.addfinalizer(
+                lambda: profiler.begin(
+                    ("finalizer", id(fixturedef)), f"{fixturedef.argname} (finalizer)", "fixture"
+                )
+            )
+
+    def pytest_fixture_post_finalizer(self, fixturedef, request):
+        profiler.end(("finalizer", id(fixturedef)))
+
+    def pytest_sessionfinish(self, session):
+        profiler.close_all()
+        trace = session.config.getoption("profile_trace")
+        if trace:
+            with open(trace, "w") as handle:
+                json.dump({"traceEvents": profiler.trace_events()}, handle)
+        stacks = session.config.getoption("profile_stacks")
+        if stacks:
+            with open(stacks, "w") as handle:
+                handle.write("\n".join(profiler.collapsed_stacks()) + "\n")
@@ -0,0 +1,285 @@
+"""Recording of remote round trips made by tests and fixtures.
+
+The ``ansible_module`` fixture of pytest-ansible is wrapped in a proxy which
+records every module call, and commands run by :mod:`testfm.helpers` are
+recorded through :func:`testfm.executor.add_listener`. Each
+:class:`RoundTrip` is attributed to the running test, its phase (``setup``,
+``call`` or ``teardown``) and the fixture being set up or torn down.
+
+At the end of the session the cost per test and per fixture is printed in the
+terminal summary, ``--roundtrip-report PATH`` writes the whole table to a file.
+"""
+import time
+from collections import defaultdict
+from typing import NamedTuple
+from typing import Optional
+
+import pytest
+
+from testfm.executor import add_listener
+from testfm.executor import remove_listener
+from testfm.helpers import batched_commands
+
+# modules whose first argument is a command line, costs are grouped by the program,
+# "run" stands for testfm.helpers.run
+COMMAND_MODULES = ("command", "shell", "raw", "run")
+# rows of each table in the terminal summary
+SUMMARY_ROWS = 10
+
+
+def _program(command):
+    """Return name of the program run by shell ``command``"""
+    return (command.split(None, 1) or [""])[0].rsplit("/", 1)[-1]
+
+
+class RoundTrip(NamedTuple):
+    """Single remote call
+
+    :param str test: node id of the test running the call
+    :param str phase: ``setup``, ``call`` or ``teardown``
+    :param str fixture: fixture being set up or torn down, ``None`` in the test itself
+    :param str source: ``ansible`` for ``ansible_module`` calls, ``helpers`` for
+        :func:`testfm.helpers.run`
+    :param str module: ansible module, or ``run`` for helpers
+    :param str program: program run by command modules, the module name otherwise
+    :param str args: shortened arguments of the call
+    :param float seconds: local wall time of the call
+    :param int rc: exit code, highest one of all hosts, ``None`` when unknown
+    :param int size: bytes of stdout and stderr of all hosts
+    """
+
+    test: Optional[str]
+    phase: Optional[str]
+    fixture: Optional[str]
+    source: str
+    module: str
+    program: str
+    args: str
+    seconds: float
+    rc: Optional[int]
+    size: int
+
+
+class Recorder:
+    """Keeps the round trips of the session and the context to attribute them to"""
+
+    def __init__(self):
+        self.calls = []
+        self.test = None
+        self.phase = None
+        self.fixtures = []
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """Call ``callback(round_trip)`` for every recorded round trip"""
+        self._subscribers.append(callback)
+
+    def record(self, source, module, args, seconds, rc, size, program=None):
+        """Store a round trip in the current context and return it
+
+        :param str program: program the call is attributed to, derived from
+            ``module`` and ``args`` by default
+        """
+        if program is None:
+            program = _program(args) if module in COMMAND_MODULES and args else module
+        call = RoundTrip(
+            self.test,
+            self.phase,
+            self.fixtures[-1] if self.fixtures else None,
+            source,
+            module,
+            program,
+            args[:200],
+            seconds,
+            rc,
+            size,
+        )
+        self.calls.append(call)
+        for callback in self._subscribers:
+            callback(call)
+        return call
+
+    def on_command(self, command, result, seconds):
+        """Listener of :func:`testfm.executor.add_listener`"""
+        program = None
+        batched = batched_commands(command)
+        if batched:
+            # a run_batch script, attributed to the programs it runs
+            program = ",".join(dict.fromkeys(_program(command) for command in batched))
+            command = "; ".join(batched)
+        elif not isinstance(command, str):
+            command = " ".join(command)
+        size = len(result.stdout) + len(result.stderr)
+        self.record("helpers", "run", command, seconds, result.rc, size, program)
+
+
+recorder = Recorder()
+
+
+def _outcome(result):
+    """Return highest rc and output bytes of ad-hoc ``result`` of all contacted hosts"""
+    rcs = []
+    size = 0
+    values = getattr(result, "values", None)
+    for value in values() if callable(values) else []:
+        if not isinstance(value, dict):
+            continue
+        if isinstance(value.get("rc"), int):
+            rcs.append(value["rc"])
+        size += len(str(value.get("stdout", ""))) + len(str(value.get("stderr", "")))
+    return (max(rcs) if rcs else None), size
+
+
+class RecordingModuleDispatcher:
+    """Proxy of pytest-ansible module dispatcher recording every module call"""
+
+    def __init__(self, dispatcher, recorder):
+        self._dispatcher = dispatcher
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attribute = getattr(self._dispatcher, name)
+        if name.startswith("_") or hasattr(type(self._dispatcher), name):
+            # own attributes of the dispatcher like has_module, not ansible modules
+            return attribute
+
+        def module(*args, **kwargs):
+            call_args = " ".join(
+                [str(arg) for arg in args] + [f"{key}={val}" for key, val in kwargs.items()]
+            )
+            start = time.monotonic()
+            result = None
+            try:
+                result = attribute(*args, **kwargs)
+                return result
+            finally:
+                rc, size = _outcome(result)
+                self._recorder.record(
+                    "ansible", name, call_args, time.monotonic() - start, rc, size
+                )
+
+        return module
+
+
+@pytest.fixture
+def ansible_module(ansible_module):
+    """``ansible_module`` of pytest-ansible recording every module call"""
+    return RecordingModuleDispatcher(ansible_module, recorder)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--roundtrip-report",
+        metavar="PATH",
+        help="Write remote round trips of every test and fixture to PATH",
+    )
+
+
+def pytest_configure(config):
+    add_listener(recorder.on_command)
+
+
+def pytest_unconfigure(config):
+    remove_listener(recorder.on_command)
+
+
+def _phase(item, phase):
+    recorder.test, recorder.phase = item.nodeid, phase
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    _phase(item, "setup")
+    yield
+    recorder.phase = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    _phase(item, "call")
+    yield
+    recorder.phase = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    _phase(item, "teardown")
+    yield
+    recorder.test = recorder.phase = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    # finalizers run last in first out: the one added after the setup marks the
+    # start of the teardown of the fixture, the one added before marks its end
+    fixturedef.addfinalizer(recorder.fixtures.pop)
+    recorder.fixtures.append(fixturedef.argname)
+    try:
+        yield
+    finally:
+        recorder.fixtures.pop()
+        fixturedef.addfinalizer(lambda: recorder.fixtures.append(fixturedef.argname))
+
+
+def cost_table(calls, key):
+    """Return rows ``(name, round trips, seconds, bytes, programs)`` grouped by ``key``
+
+    :param calls: :class:`RoundTrip` records
+    :param key: function returning the group of a round trip, ``None`` skips it
+    :return: rows sorted by seconds, the most expensive first; programs maps
+        program to seconds spent in it
+    """
+    groups = defaultdict(list)
+    for call in calls:
+        name = key(call)
+        if name is not None:
+            groups[name].append(call)
+    rows = []
+    for name, grouped in groups.items():
+        programs = defaultdict(float)
+        for call in grouped:
+            programs[call.program] += call.seconds
+        rows.append(
+            (
+                name,
+                len(grouped),
+                sum(call.seconds for call in grouped),
+                sum(call.size for call in grouped),
+                dict(sorted(programs.items(), key=lambda item: -item[1])),
+            )
+        )
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def format_table(title, rows):
+    """Return cost ``rows`` of :func:`cost_table` as text lines"""
+    lines = [title, f"{'round trips':>11} {'seconds':>9} {'bytes':>10}  name (seconds per program)"]
+    for name, count, seconds, size, programs in rows:
+        spent = ", ".join(f"{program} {spent:.1f}" for program, spent in programs.items())
+        lines.append(f"{count:>11} {seconds:>9.1f} {size:>10}  {name} ({spent})")
+    return lines
+
+
+def _tables(rows=None):
+    by_test = cost_table(recorder.calls, lambda call: call.test)
+    by_fixture = cost_table(recorder.calls, lambda call: call.fixture)
+    return (
+        format_table("Remote round trips per test", by_test[:rows])
+        + [""]
+        + format_table("Remote round trips per fixture", by_fixture[:rows])
+    )
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not recorder.calls:
+        return
+    terminalreporter.section("remote round trips")
+    for line in _tables(SUMMARY_ROWS):
+        terminalreporter.write_line(line)
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("roundtrip_report")
+    if path:
+        with open(path, "w") as report:
+            report.write("\n".join(_tables()) + "\n")
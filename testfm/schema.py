@@ -0,0 +1,193 @@
+"""Local validation of satellite-maintain options.
+
+Every builder validates its options against the schema of the command before
+the command is returned, so a typo like ``{"tag": "pre-upgrade"}`` fails in
+microseconds instead of after a remote run.
+
+The schema maps a command like ``health check`` to its options, e.g.
+``{"--label": True, "-y": False}`` where the value tells whether the option
+takes an argument. It comes from the ``--help`` output of the installed
+rubygem-foreman_maintain, cached per version (see :func:`save`), and falls
+back to the ``--help`` text copied into the builder docstrings. Docstrings may
+lag behind the installed version, so options they do not know only emit
+:class:`SchemaWarning`. Commands known to neither are not validated.
+Validation is turned off with ``settings.schema.validate``.
+"""
+import re
+import sys
+import warnings
+from functools import lru_cache
+
+from testfm import cache
+from testfm import settings
+from testfm.facts import cached
+
+_USAGE = re.compile(r"^\s*Usage:\s*\n\s*satellite-maintain\s+(.*)$", re.MULTILINE)
+_OPTION = re.compile(r"^\s+(-{1,2}[^\s,]+(?:,\s*-{1,2}[^\s,]+)*)(?: (\S+))?(?:\s{2,}|$)")
+
+_schemas = {}
+
+
+class CommandOptionError(ValueError):
+    """Raised when a builder gets an option the command does not accept"""
+
+
+class SchemaWarning(UserWarning):
+    """Emitted instead of :class:`CommandOptionError` when only docstrings know the command"""
+
+
+def parse_help(text):
+    """Parse ``--help`` output of a satellite-maintain command
+
+    :param str text: output of e.g. ``satellite-maintain health check --help``
+    :return: tuple of command, like ``health check``, and dict of option switch
+        to whether it takes an argument; command is ``None`` when the usage line
+        is missing or the command only groups subcommands
+    """
+    usage = _USAGE.search(text)
+    command = None
+    if usage and "SUBCOMMAND" not in usage.group(1):
+        words = []
+        for word in usage.group(1).split():
+            if word.startswith("[") or word.isupper():
+                break
+            words.append(word)
+        command = " ".join(words)
+    options = {}
+    in_options = False
+    for line in text.splitlines():
+        if line.strip() == "Options:":
+            in_options = True
+            continue
+        if in_options and line.strip() and not line[0].isspace():
+            in_options = False
+        match = _OPTION.match(line) if in_options else None
+        if not match:
+            continue
+        for switch in re.split(r",\s*", match.group(1)):
+            if "[no-]" in switch:
+                # clamp flags like --[no-]color accept both spellings
+                options[switch.replace("[no-]", "")] = False
+                options[switch.replace("[no-]", "no-")] = False
+            else:
+                options[switch] = match.group(2) is not None
+    return command, options
+
+
+def _cache_entry(version):
+    return cache.cache_path("schema", f"{version}.json")
+
+
+def load(version):
+    """Return schema cached for rubygem-foreman_maintain ``version``, ``{}`` if there is none"""
+    if version not in _schemas:
+        _schemas[version] = cache.load(_cache_entry(version)) or {}
+    return _schemas[version]
+
+
+def save(version, helps):
+    """Cache schema of rubygem-foreman_maintain ``version``
+
+    :param str version: rubygem-foreman_maintain package, as in :attr:`HostFacts.foreman_maintain`
+    :param dict helps: command, like ``health check``, to its ``--help`` output
+    :return: the stored schema
+    """
+    schema = {command: parse_help(text)[1] for command, text in helps.items()}
+    cache.dump(_cache_entry(version), schema)
+    _schemas[version] = schema
+    return schema
+
+
+@lru_cache(maxsize=None)
+def docstring_schema(builder):
+    """Return schema parsed from ``--help`` text copied into docstrings of ``builder`` class"""
+    docs = [sys.modules[builder.__module__].__doc__, builder.__doc__]
+    docs += [getattr(builder, name).__doc__ for name in dir(builder) if not name.startswith("_")]
+    schema = {}
+    for doc in docs:
+        if not isinstance(doc, str):
+            continue
+        command, options = parse_help(doc)
+        if command:
+            schema[command] = options
+    return schema
+
+
+def _lookup(spec, builder=None):
+    """Return options of the command of ``spec`` and whether they come from a cached schema"""
+    command = f"{spec.base} {spec.sub}".strip()
+    facts = cached()
+    if facts is not None and facts.foreman_maintain:
+        options = load(facts.foreman_maintain).get(command)
+        if options is not None:
+            return options, True
+    if builder is not None:
+        return docstring_schema(builder).get(command), False
+    return None, False
+
+
+def options_of(spec, builder=None):
+    """Return known options of the command described by ``spec``, ``None`` when unknown
+
+    The lookup uses only locally available data: cached facts and schema.
+    """
+    return _lookup(spec, builder)[0]
+
+
+def _check(command, options, switch, has_value):
+    if switch not in options:
+        raise CommandOptionError(f"satellite-maintain {command} has no option {switch}")
+    if has_value is not None and has_value != options[switch]:
+        verb = "requires" if options[switch] else "does not take"
+        raise CommandOptionError(f"option {switch} of satellite-maintain {command} {verb} a value")
+
+
+def validate(spec, builder=None):
+    """Raise :class:`CommandOptionError` when ``spec`` has an option its command does not accept
+
+    Only :class:`SchemaWarning` is emitted when the options of the command are
+    known from the docstrings alone.
+
+    :param spec: :class:`testfm.base.CommandSpec` to check
+    :param builder: :class:`testfm.base.Base` subclass which built ``spec``,
+        its docstrings are used when no schema is cached
+    """
+    if not settings.get("schema.validate", True):
+        return
+    options, introspected = _lookup(spec, builder)
+    if not options:
+        return
+    command = f"{spec.base} {spec.sub}".strip()
+    try:
+        _check_tokens(command, options, spec.options)
+    except CommandOptionError as error:
+        if introspected:
+            raise
+        warnings.warn(SchemaWarning(f"{error} according to docstrings of {builder.__name__}"))
+
+
+def _check_tokens(command, options, tokens):
+    tokens = iter(tokens)
+    for token in tokens:
+        if isinstance(token, tuple):
+            key, val = token
+            if val is not False:
+                _check(command, options, f"--{key}", val is not True)
+            continue
+        token = str(token)
+        if token == "--":
+            # everything after is positional
+            break
+        if token.startswith("--"):
+            switch, has_value, _ = token.partition("=")
+            _check(command, options, switch, True if has_value else None)
+            if options[switch] and not has_value:
+                next(tokens, None)
+        elif token.startswith("-") and len(token) > 1:
+            # short switches may be grouped like -yf, the last one may take the next token
+            for position, letter in enumerate(token[1:], start=2):
+                _check(command, options, f"-{letter}", None)
+                if options[f"-{letter}"]:
+                    if position == len(token):
+                        next(tokens, None)
+                    break
@@ -30,12 +30,10 @@ class Service(Base):
     def service_start(cls, options=None):
         """Build satellite-maintain service start"""
 
-        cls.command_sub = "start"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "start")
 
         return result
 
@@ -43,12 +41,10 @@ class Service(Base):
     def service_stop(cls, options=None):
         """Build satellite-maintain service stop"""
 
-        cls.command_sub = "stop"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "stop")
 
         return result
 
@@ -56,12 +52,10 @@ class Service(Base):
     def service_restart(cls, options=None):
         """Build satellite-maintain service"""
 
-        cls.command_sub = "restart"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "restart")
 
         return result
 
@@ -69,12 +63,10 @@ class Service(Base):
     def service_status(cls, options=None):
         """Build satellite-maintain service status"""
 
-        cls.command_sub = "status"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "status")
 
         return result
 
@@ -82,12 +74,10 @@ class Service(Base):
     def service_enable(cls, options=None):
         """Build satellite-maintain service enable"""
 
-        cls.command_sub = "enable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "enable")
 
         return result
 
@@ -95,12 +85,10 @@ class Service(Base):
     def service_disable(cls, options=None):
         """Build satellite-maintain service disable"""
 
-        cls.command_sub = "disable"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "disable")
 
         return result
 
@@ -108,11 +96,9 @@ class Service(Base):
     def service_list(cls, options=None):
         """Build satellite-maintain service list"""
 
-        cls.command_sub = "list"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "list")
 
         return result
@@ -0,0 +1,459 @@
+"""In-memory stand-in for satellite-maintain, for runs without any host.
+
+Selected with ``settings.executor.backend: simulator``, every host of the
+inventory then gets its own :class:`Simulator`. It understands the commands the
+builders produce for ``maintenance-mode``, ``packages``, ``service`` and
+``health``, keeps their state and prints output in the format of
+satellite-maintain, so :mod:`testfm.parser` and the helpers work on it like on a
+real server. It also answers the facts query of :mod:`testfm.facts`.
+
+Nothing is run in a shell, commands other than satellite-maintain fail with
+rc 127, :func:`testfm.helpers.run_batch` therefore sends batched commands one
+by one. ``--help`` prints the options the simulator understands, in the format
+:mod:`testfm.introspect` reads. A command costs microseconds, which makes the
+simulator suitable for load tests of the harness itself::
+
+    TESTFM_EXECUTOR__BACKEND=simulator python -c \\
+        'from testfm.helpers import fan_out; print(fan_out("satellite-maintain service list"))'
+
+Tests change the state directly, e.g. ``simulator_for(host).failing.add("server-ping")``.
+"""
+import shlex
+import threading
+import uuid
+from typing import NamedTuple
+
+from testfm.facts import BOOT_ID_COMMAND
+from testfm.facts import FACTS_SCRIPT
+from testfm.parser import FAIL
+from testfm.parser import OK
+
+VERSION = "6.15.0"
+FOREMAN_MAINTAIN = "rubygem-foreman_maintain-1.5.1-1.el8sat.noarch"
+RHEL_MAJOR = 8
+PROGRAMS = ("satellite-maintain", "foreman-maintain")
+# column the status of a step is printed at
+STATUS_COLUMN = 70
+SEPARATOR = "-" * 80
+
+SERVICES = (
+    "redis.service",
+    "postgresql.service",
+    "pulpcore-api.service",
+    "pulpcore-content.service",
+    "pulpcore-worker@*.service",
+    "tomcat.service",
+    "dynflow-sidekiq@.service",
+    "foreman-proxy.service",
+    "foreman.service",
+    "httpd.service",
+    "puppetserver.service",
+)
+
+# options of the commands taking a value, every other option is a flag
+VALUE_OPTIONS = ("label", "tags", "whitelist", "only", "exclude")
+SHORT_OPTIONS = {"y": "assumeyes", "w": "whitelist", "f": "force", "h": "help"}
+
+# options of most scenario commands, as printed by --help
+SCENARIO_OPTIONS = (
+    ("-y, --assumeyes", "Automatically answer yes for all questions"),
+    ("-w, --whitelist whitelist", "Comma-separated list of labels of steps to be ignored"),
+    ("-f, --force", "Force steps that would be skipped as they were already run"),
+)
+SERVICE_OPTIONS = (
+    ("--exclude exclude", "A comma-separated list of services to skip"),
+    ("--only only", "A comma-separated list of services to include"),
+)
+# command to options printed by its --help, commands missing here only take --help
+HELP_OPTIONS = {
+    ("health", "check"): (
+        ("--label label", "Limit only for a specific label."),
+        ("--tags tags", "Limit only for specific set of labels."),
+        *SCENARIO_OPTIONS,
+    ),
+    ("health", "list"): (("--tags tags", "Limit only for specific set of labels."),),
+    ("packages", "lock"): SCENARIO_OPTIONS,
+    ("packages", "unlock"): SCENARIO_OPTIONS,
+    ("packages", "status"): SCENARIO_OPTIONS,
+    ("packages", "is-locked"): SCENARIO_OPTIONS,
+    ("service", "start"): SERVICE_OPTIONS,
+    ("service", "stop"): SERVICE_OPTIONS,
+    ("service", "restart"): SERVICE_OPTIONS,
+    ("service", "status"): SERVICE_OPTIONS,
+    ("service", "list"): SERVICE_OPTIONS,
+}
+
+
+class SimulatedCheck(NamedTuple):
+    """Health check known to the simulator"""
+
+    label: str
+    description: str
+    tags: tuple
+
+
+CHECKS = (
+    SimulatedCheck(
+        "server-ping", "Check whether all services are running using the ping call", ("default",)
+    ),
+    SimulatedCheck("services-up", "Check whether all services are running", ("default",)),
+    SimulatedCheck(
+        "check-hotfix-installed", "Check to verify if any hotfix installed on system", ()
+    ),
+    SimulatedCheck(
+        "check-tftp-storage", "Check if tftp directory contains old boot files", ("default",)
+    ),
+    SimulatedCheck(
+        "available-space",
+        "Check to make sure root(/) partition has enough space",
+        ("pre-upgrade",),
+    ),
+    SimulatedCheck(
+        "check-tmout-variable", "Check if TMOUT environment variable is set", ("pre-upgrade",)
+    ),
+    SimulatedCheck("env-proxy", "Check to make sure no HTTP(S) proxy set in ENV", ("pre-upgrade",)),
+    SimulatedCheck(
+        "foreman-tasks-not-paused", "Check for paused tasks", ("default", "pre-upgrade")
+    ),
+)
+
+
+def _step(description, status, message=""):
+    lines = [f"{description}:".ljust(STATUS_COLUMN) + f"[{status}]"]
+    if message:
+        lines.append(message)
+    return lines + [SEPARATOR]
+
+
+def _scenario(title, steps):
+    """Return output of scenario ``title`` with ``steps`` of ``(label, description, status,
+    message)`` and the summary of failed ones"""
+    lines = [f"Running {title}", "=" * 80]
+    failed = []
+    for label, description, status, message in steps:
+        lines += _step(description, status, message)
+        if status == FAIL:
+            failed.append(label)
+    if failed:
+        lines += [
+            f"Scenario [{title}] failed.",
+            "",
+            "The following steps ended up in failing state:",
+            "",
+            *[f"  [{label}]" for label in failed],
+            "",
+            "Resolve the failed steps and rerun the command.",
+            "In case the failures are false positives, use",
+            f'--whitelist="{",".join(failed)}"',
+        ]
+    return (1 if failed else 0), "\n".join(lines)
+
+
+def _split(value):
+    return [part for part in value.split(",") if part] if isinstance(value, str) else []
+
+
+class Simulator:
+    """satellite-maintain of a single simulated host
+
+    :ivar bool maintenance_mode: maintenance-mode is on
+    :ivar bool packages_locked: packages are locked against updates
+    :ivar dict running: service name to whether it runs
+    :ivar list sync_plans: ids of enabled sync plans, disabled by maintenance-mode
+    :ivar set failing: labels of health checks which fail
+    :ivar bool multiple_labels: ``health check --label`` takes comma-separated
+        labels, older versions take a single one
+    """
+
+    def __init__(self, host, checks=CHECKS, services=SERVICES):
+        self.host = host
+        self.boot_id = str(uuid.uuid4())
+        self.checks = {check.label: check for check in checks}
+        self.maintenance_mode = False
+        self.packages_locked = True
+        self.installer_locking = True
+        self.running = dict.fromkeys(services, True)
+        self.sync_plans = []
+        self.disabled_sync_plans = []
+        self.failing = set()
+        self.multiple_labels = True
+        self._lock = threading.Lock()
+        self._handlers = {
+            ("maintenance-mode", "start"): self.maintenance_mode_start,
+            ("maintenance-mode", "stop"): self.maintenance_mode_stop,
+            ("maintenance-mode", "status"): self.maintenance_mode_status,
+            ("maintenance-mode", "is-enabled"): self.maintenance_mode_is_enabled,
+            ("packages", "lock"): self.packages_lock,
+            ("packages", "unlock"): self.packages_unlock,
+            ("packages", "status"): self.packages_status,
+            ("packages", "is-locked"): self.packages_is_locked,
+            ("service", "start"): self.service_start,
+            ("service", "stop"): self.service_stop,
+            ("service", "restart"): self.service_restart,
+            ("service", "status"): self.service_status,
+            ("service", "list"): self.service_list,
+            ("health", "list"): self.health_list,
+            ("health", "list-tags"): self.health_list_tags,
+            ("health", "check"): self.health_check,
+        }
+
+    def execute(self, command):
+        """Run ``command`` and return ``(rc, stdout, stderr)``
+
+        :param command: shell command string or argument list
+        """
+        if command == FACTS_SCRIPT:
+            return 0, self.facts(), ""
+        if command == BOOT_ID_COMMAND:
+            return 0, f"{self.boot_id}\n", ""
+        argv = shlex.split(command) if isinstance(command, str) else list(command)
+        # environment assignments like LC_ALL=C
+        while argv and "=" in argv[0] and not argv[0].startswith("-"):
+            argv.pop(0)
+        if not argv or argv[0].rsplit("/", 1)[-1] not in PROGRAMS:
+            program = argv[0] if argv else ""
+            return 127, "", f"sh: {program}: command not found"
+        positional = [arg for arg in argv[1:] if not arg.startswith("-")]
+        options = self._options(argv[1:])
+        if options.get("help"):
+            return self.help(positional[:2])
+        handler = self._handlers.get(tuple(positional[:2]))
+        if handler is None:
+            return 1, "", f"ERROR: Unable to find subcommand '{' '.join(positional[:2])}'."
+        with self._lock:
+            return (*handler(options), "")
+
+    def help(self, words):
+        """Return ``(rc, stdout, stderr)`` of ``--help`` of command ``words``, like ``health``"""
+        subcommands = {}
+        for command in self._handlers:
+            subcommands.setdefault(command[0], []).append(command[1])
+        options = [("-h, --help", "print help")]
+        if tuple(words) in self._handlers:
+            usage = f"{' '.join(words)} [OPTIONS]"
+            options = [*HELP_OPTIONS.get(tuple(words), ()), *options]
+            listed = []
+        elif len(words) < 2 and (not words or words[0] in subcommands):
+            usage = " ".join([*words, "[OPTIONS] SUBCOMMAND [ARG] ..."])
+            listed = subcommands[words[0]] if words else list(subcommands)
+        else:
+            return 1, "", f"ERROR: Unable to find subcommand '{' '.join(words)}'."
+        lines = ["Usage:", f"    satellite-maintain {usage}", ""]
+        if listed:
+            lines += ["Subcommands:", *[f"    {name}" for name in listed], ""]
+        lines += ["Options:", *[f"    {switch:<30}{text}" for switch, text in options]]
+        return 0, "\n".join(lines), ""
+
+    @staticmethod
+    def _options(args):
+        """Return dict of options in ``args``, flags map to ``True``"""
+        options = {}
+        args = list(args)
+        while args:
+            arg = args.pop(0)
+            if not arg.startswith("-"):
+                continue
+            key, has_value, value = arg.lstrip("-").partition("=")
+            key = SHORT_OPTIONS.get(key, key)
+            if not has_value and key in VALUE_OPTIONS and args:
+                value = args.pop(0)
+            options[key] = value if key in VALUE_OPTIONS else True
+        return options
+
+    def facts(self):
+        """Return output of :data:`testfm.facts.FACTS_SCRIPT`"""
+        return (
+            f"server=satellite\nversion={VERSION}\nrhel_major={RHEL_MAJOR}\n"
+            f"foreman_maintain={FOREMAN_MAINTAIN}\nboot_id={self.boot_id}"
+        )
+
+    def _services(self, options):
+        only, exclude = _split(options.get("only")), _split(options.get("exclude"))
+        return [
+            name
+            for name in self.running
+            if (not only or name.split(".")[0] in only or name in only)
+            and name.split(".")[0] not in exclude
+            and name not in exclude
+        ]
+
+    def maintenance_mode_start(self, options):
+        count = len(self.sync_plans)
+        self.disabled_sync_plans, self.sync_plans = self.sync_plans, []
+        self.maintenance_mode = True
+        return _scenario(
+            "Start maintenance mode",
+            [
+                (None, "Add maintenance_mode tables in nftables", OK, ""),
+                (
+                    None,
+                    "Disable active sync plans",
+                    OK,
+                    f"Total {count} sync plans are now disabled.",
+                ),
+                (None, "Stop crond service", OK, ""),
+            ],
+        )
+
+    def maintenance_mode_stop(self, options):
+        count = len(self.disabled_sync_plans)
+        self.sync_plans, self.disabled_sync_plans = self.disabled_sync_plans, []
+        self.maintenance_mode = False
+        return _scenario(
+            "Stop maintenance mode",
+            [
+                (None, "Remove maintenance_mode table from nftables", OK, ""),
+                (None, "Enable sync plans", OK, f"Total {count} sync plans are now enabled."),
+                (None, "Start crond service", OK, ""),
+            ],
+        )
+
+    def maintenance_mode_status(self, options):
+        on = self.maintenance_mode
+        message = "\n".join(
+            [
+                f"Status of maintenance-mode: {'On' if on else 'Off'}",
+                f"- Nftables table: {'present' if on else 'absent'}",
+                f"- sync plans: {'disabled' if on else 'enabled'}",
+                f"- cron jobs: {'not running' if on else 'running'}",
+            ]
+        )
+        _, output = _scenario(
+            "Status of maintenance-mode", [(None, "Get maintenance-mode status", OK, message)]
+        )
+        return 0, output
+
+    def maintenance_mode_is_enabled(self, options):
+        message = f"Maintenance mode is {'On' if self.maintenance_mode else 'Off'}"
+        _, output = _scenario(
+            "Status code for maintenance-mode",
+            [(None, "Check if maintenance mode is on", OK, message)],
+        )
+        return (0 if self.maintenance_mode else 1), output
+
+    def packages_lock(self, options):
+        self.packages_locked = True
+        return _scenario("Lock packages", [(None, "Lock packages", OK, "")])
+
+    def packages_unlock(self, options):
+        self.packages_locked = False
+        return _scenario("Unlock packages", [(None, "Unlock packages", OK, "")])
+
+    def packages_status(self, options):
+        installer = "enabled" if self.installer_locking else "disabled"
+        message = (
+            f"Automatic locking of package versions is {installer} in installer.\n"
+            f"Packages are {'' if self.packages_locked else 'not '}locked."
+        )
+        _, output = _scenario(
+            "Status of package locking",
+            [(None, "Check status of version locking of packages", OK, message)],
+        )
+        return 0, output
+
+    def packages_is_locked(self, options):
+        if self.packages_locked:
+            return 0, "Packages are locked"
+        return 1, "Packages are not locked"
+
+    def _switch(self, title, verb, services, running):
+        for name in services:
+            self.running[name] = running
+        message = f"{verb.capitalize()} the following service(s):\n" + ", ".join(services)
+        return _scenario(title, [(None, f"{verb.capitalize()} applicable services", OK, message)])
+
+    def service_start(self, options):
+        return self._switch("Start Services", "starting", self._services(options), True)
+
+    def service_stop(self, options):
+        return self._switch("Stop Services", "stopping", self._services(options), False)
+
+    def service_restart(self, options):
+        return self._switch("Restart Services", "restarting", self._services(options), True)
+
+    def service_status(self, options):
+        services = self._services(options)
+        stopped = [name for name in services if not self.running[name]]
+        message = "\n".join(
+            f"{name}".ljust(STATUS_COLUMN) + f"[{OK if self.running[name] else FAIL}]"
+            for name in services
+        )
+        if stopped:
+            message += f"\nSome services are not running ({', '.join(stopped)})"
+        return _scenario(
+            "Status Services",
+            [
+                (
+                    "service-status",
+                    "Get status of applicable services",
+                    FAIL if stopped else OK,
+                    message,
+                )
+            ],
+        )
+
+    def service_list(self, options):
+        message = "\n".join(
+            f"{name}".ljust(44) + ("indirect" if "@" in name else "enabled")
+            for name in self._services(options)
+        )
+        return _scenario("Service List", [(None, "List applicable services", OK, message)])
+
+    def health_list(self, options):
+        lines = []
+        for check in self.checks.values():
+            tags = " ".join(f"[{tag}]" for tag in check.tags)
+            lines.append(f"[{check.label}] {check.description}".ljust(STATUS_COLUMN) + tags)
+        return 0, "\n".join(lines)
+
+    def health_list_tags(self, options):
+        tags = sorted({tag for check in self.checks.values() for tag in check.tags})
+        return 0, "\n".join(f"[{tag}]" for tag in tags)
+
+    def _check_status(self, label):
+        if label in self.failing:
+            return FAIL, "The check failed on the simulated host."
+        stopped = [name for name, running in self.running.items() if not running]
+        if label in ("server-ping", "services-up") and stopped:
+            return FAIL, f"Following services are not running: {', '.join(stopped)}"
+        return OK, ""
+
+    def health_check(self, options):
+        labels, tags = _split(options.get("label")), _split(options.get("tags"))
+        if not self.multiple_labels and len(labels) > 1:
+            labels = [options["label"]]
+        unknown = [label for label in labels if label not in self.checks]
+        if unknown:
+            return 1, f"ERROR: No scenario matching label(s): {', '.join(unknown)}"
+        if not labels:
+            labels = [
+                check.label
+                for check in self.checks.values()
+                if set(tags or ["default"]) & set(check.tags)
+            ]
+        whitelist = _split(options.get("whitelist"))
+        steps = []
+        for label in labels:
+            status, message = self._check_status(label)
+            if label in whitelist:
+                status, message = "SKIPPED", ""
+            steps.append((label, self.checks[label].description, status, message))
+        return _scenario("ForemanMaintain::Scenario::FilteredScenario", steps)
+
+
+_simulators = {}
+_lock = threading.Lock()
+
+
+def simulator_for(host):
+    """Return :class:`Simulator` of ``host``, created on first use"""
+    with _lock:
+        if host not in _simulators:
+            _simulators[host] = Simulator(host)
+        return _simulators[host]
+
+
+def reset():
+    """Drop the state of every simulated host"""
+    with _lock:
+        _simulators.clear()
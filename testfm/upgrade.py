@@ -26,35 +26,29 @@ class Upgrade(Base):
     @classmethod
     def list_versions(cls, options=None):
         """Build satellite-maintain upgrade list-versions"""
-        cls.command_sub = "list-versions"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "list-versions")
 
         return result
 
     @classmethod
     def check(cls, options=None):
         """Build satellite-maintain upgrade check"""
-        cls.command_sub = "check"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "check")
 
         return result
 
     @classmethod
     def run(cls, options=None):
         """Build satellite-maintain upgrade run"""
-        cls.command_sub = "run"
-
         if options is None:
             options = {}
 
-        result = cls._construct_command(options)
+        result = cls._construct_command(options, "run")
 
         return result
@@ -1,10 +1,11 @@
 import datetime
 
 import pytest
-import yaml
 from fauxfactory import gen_string
 
 from testfm.advanced import Advanced
+from testfm.catalog import refresh as refresh_catalog
+from testfm.catalog import tags as catalog_tags
 from testfm.constants import CAPSULE_DOGFOOD_ACTIVATIONKEY
 from testfm.constants import DOGFOOD_ACTIVATIONKEY
 from testfm.constants import DOGFOOD_ORG
@@ -19,13 +20,90 @@ from testfm.constants import RHN_USERNAME
 from testfm.constants import satellite_answer_file
 from testfm.constants import satellite_maintain_yml
 from testfm.constants import upstream_url
+from testfm.decorators import apply_version_gates
+from testfm.facts import invalidate as invalidate_facts
+from testfm.foreman import get_client
 from testfm.helpers import product
+from testfm.helpers import run_batch
+from testfm.helpers import run_health_checks
 from testfm.helpers import server
+from testfm.hosts import hosts
 from testfm.log import logger
 from testfm.maintenance_mode import MaintenanceMode
 from testfm.packages import Packages
 from testfm.service import Service
 
+pytest_plugins = [
+    # before roundtrips, so replayed calls are recorded as round trips too
+    "testfm.plugins.cassettes",
+    "testfm.plugins.roundtrips",
+    "testfm.plugins.budget",
+    "testfm.plugins.profiler",
+]
+
+READ_ONLY_HEALTH_CHECKS = (
+    "server-ping",
+    "available-space",
+    "available-space-cp",
+    "check-tmout-variable",
+    "env-proxy",
+)
+# unknown to satellite-maintain of capsules, an unknown label fails the combined run
+SATELLITE_HEALTH_CHECKS = ("available-space-cp",)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--refresh-facts",
+        action="store_true",
+        help="Drop cached facts of the server under test and collect them again",
+    )
+    parser.addoption(
+        "--refresh-catalog",
+        action="store_true",
+        help="Collect the health check catalog used to parametrize tests again",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("refresh_facts"):
+        invalidate_facts()
+    if config.getoption("refresh_catalog"):
+        refresh_catalog()
+    config.addinivalue_line("markers", "run_only_on(*versions): run only on these x.y versions")
+    config.addinivalue_line("markers", "starts_in(version): run on x.y version and newer")
+    config.addinivalue_line("markers", "ends_in(version): run on x.y version and older")
+
+
+def pytest_generate_tests(metafunc):
+    # parametrized from the local catalog, collection never contacts the server
+    if "health_tag" in metafunc.fixturenames:
+        metafunc.parametrize("health_tag", catalog_tags())
+
+
+def pytest_collection_modifyitems(items):
+    apply_version_gates(items)
+
+
+@pytest.fixture(scope="session")
+def foreman():
+    """Foreman API client of the server under test"""
+    return get_client()
+
+
+@pytest.fixture(scope="session")
+def health_checks():
+    """Results of read-only health checks, all run by one satellite-maintain invocation
+
+    Maps label to :class:`testfm.helpers.HealthCheckResult`, only checks which
+    need no setup and change nothing belong to :data:`READ_ONLY_HEALTH_CHECKS`.
+    Those of :data:`SATELLITE_HEALTH_CHECKS` run on satellites only.
+    """
+    labels = READ_ONLY_HEALTH_CHECKS
+    if server() != "satellite":
+        labels = [label for label in labels if label not in SATELLITE_HEALTH_CHECKS]
+    return run_health_checks(labels)
+
 
 @pytest.fixture(scope="function")
 def setup_hotfix_check(request, ansible_module):
@@ -154,7 +232,7 @@ def setup_install_pexpect(ansible_module, request):
 
 
 @pytest.fixture(scope="function")
-def setup_sync_plan(request, ansible_module):
+def setup_sync_plan(request, ansible_module, foreman):
     """This fixture is used to create/delete sync-plan.
     It is used by tests test_positive_sync_plan_disable_enable and test_positive_maintenance_mode.
     """
@@ -164,47 +242,18 @@ def setup_sync_plan(request, ansible_module):
     )
 
     def sync_plan():
-        org_ids = []
-        sync_ids = []
-        sat_hostname = ""
         sync_date = datetime.datetime.today().strftime("%Y-%m-%d")
-        setup = ansible_module.command(
-            'hammer sync-plan create --name {} --enabled true \
-            --interval "weekly" --sync-date {} --organization-id 1'.format(
-                sync_plan_name, sync_date
-            )
-        )
-        for result in setup.values():
-            assert result["rc"] == 0
-        # Find all sync-plan id present in satellite
-        for facts in ansible_module.setup().items():
-            sat_hostname = facts[0]
-        setup = ansible_module.shell("hammer --output json organization list > /tmp/orgs.yaml")
-        ansible_module.fetch(src="/tmp/orgs.yaml", dest="./")
-        with open(f"./{sat_hostname}/tmp/orgs.yaml") as f:
-            org_yml = yaml.safe_load(f)
-        for id in org_yml:
-            org_ids.append(id["Id"])
-        for id in org_ids:
-            ansible_module.shell(
-                "hammer --output yaml sync-plan list --organization-id {} | "
-                "sed -n '1!p' >> /tmp/sync_id.yaml".format(id)
-            )
-        ansible_module.fetch(src="/tmp/sync_id.yaml", dest="./")
-        with open(f"./{sat_hostname}/tmp/sync_id.yaml") as f:
-            sync_yml = yaml.safe_load(f)
-            for id in sync_yml:
-                if id["Enabled"]:
-                    sync_ids.append(id["Id"])
+        foreman.create_sync_plan(1, sync_plan_name, interval="weekly", sync_date=sync_date)
+        # Find all enabled sync-plan ids present in satellite, organizations are queried at once
+        sync_ids = [plan["id"] for plan in foreman.enabled_sync_plans()]
         request.addfinalizer(teardown_sync_plan)
-        return list(set(sync_ids)), sat_hostname
+        # files fetched by ansible are stored under the inventory name of the host
+        return list(set(sync_ids)), hosts("server")[0]
 
     def teardown_sync_plan():
         teardown = ansible_module.command(MaintenanceMode.stop())
         for result in teardown.values():
             assert result["rc"] == 0
-        for path in ["/tmp/sync_id.yaml", "/tmp/orgs.yaml"]:
-            ansible_module.file(path=path, state="absent")
         ansible_module.lineinfile(
             dest=satellite_maintain_yml, state="absent", line=":manage_crond: true"
         )
@@ -403,18 +452,15 @@ def setup_packages_lock_tests(request, ansible_module, setup_subscribe_to_cdn_do
     for result in contacted.values():
         logger.info(result["stdout"])
         assert result["rc"] == 0
-    contacted = ansible_module.command(Packages.status())
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "Packages are locked." in result["stdout"]
-        assert "Automatic locking of package versions is enabled in installer." in result["stdout"]
-        assert "FAIL" not in result["stdout"]
-        assert result["rc"] == 0
-    contacted = ansible_module.command(Packages.is_locked())
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "Packages are locked" in result["stdout"]
-        assert result["rc"] == 0
+    status, is_locked = run_batch([Packages.status(), Packages.is_locked()])
+    logger.info(status.stdout)
+    assert "Packages are locked." in status.stdout
+    assert "Automatic locking of package versions is enabled in installer." in status.stdout
+    assert "FAIL" not in status.stdout
+    assert status.rc == 0
+    logger.info(is_locked.stdout)
+    assert "Packages are locked" in is_locked.stdout
+    assert is_locked.rc == 0
 
     def teardown_packages_lock_tests():
         contacted = ansible_module.yum(name="zsh", state="absent")
@@ -432,54 +478,37 @@ def setup_packages_lock_tests(request, ansible_module, setup_subscribe_to_cdn_do
 
 
 @pytest.fixture(scope="function")
-def setup_tftp_storage(request, ansible_module):
+def setup_tftp_storage(request, foreman):
     """Setup/Teardown for test_positive_check_tftp_storage"""
-    setup = ansible_module.command("hammer settings set --name token_duration --value 2")
-    assert setup.values()[0]["rc"] == 0
+    token_duration = foreman.setting("token_duration")
+    foreman.update_setting("token_duration", 2)
 
     def teardown_tftp_storage():
-        teardown = ansible_module.command("hammer settings set --name token_duration --value 360")
-        assert teardown.values()[0]["rc"] == 0
+        foreman.update_setting("token_duration", token_duration)
 
     request.addfinalizer(teardown_tftp_storage)
 
 
 @pytest.fixture(scope="function")
-def setup_yum_content(request, ansible_module):
+def setup_yum_content(request, foreman):
     """Setup/Teardown custom yum repo for test_positive_content_migrate"""
-    prod_name = gen_string("alpha")
-    repo_name = gen_string("alpha")
-    repo_url = FAKE_YUM0_REPO
-
-    ansible_module.command(f"hammer product create --organization-id 1 --name {prod_name}")
-    ansible_module.command(
-        f"hammer repository create --organization-id 1 --name {repo_name} --product {prod_name} "
-        f"--content-type 'yum' --url {repo_url} --download-policy 'immediate'"
-    )
-    setup = ansible_module.command(
-        f"hammer repository synchronize --organization-id 1 --product {prod_name} "
-        f"--name {repo_name}"
-    )
-    assert setup.values()[0]["rc"] == 0
+    product = foreman.create_product(1, gen_string("alpha"))
+    repository = foreman.create_repository(product["id"], gen_string("alpha"), FAKE_YUM0_REPO)
+    foreman.synchronize_repository(repository["id"])
 
     def teardown_yum_content():
-        teardown = ansible_module.command(
-            f"hammer product delete --organization-id 1 --name {prod_name}"
-        )
-        assert teardown.values()[0]["rc"] == 0
+        foreman.delete_product(product["id"])
 
     request.addfinalizer(teardown_yum_content)
 
 
 @pytest.fixture(scope="function")
-def setup_corrupted_role(request, ansible_module):
+def setup_corrupted_role(request, ansible_module, foreman):
     """This fixture is used to corrupt a role for test test_corrupted_roles"""
     role_name = "test_role"
     resource_type = gen_string("alpha")
-    ansible_module.command(f"hammer role create --name {role_name}")
-    ansible_module.command(
-        f"hammer filter create --role {role_name} --permissions view_hosts,console_hosts"
-    )
+    role = foreman.create_role(role_name)
+    foreman.create_filter(role["id"], ["view_hosts", "console_hosts"])
     permission_name = r"'\''console_hosts'\''"
     resource_type = rf"'\''{resource_type}'\''"
     setup = ansible_module.shell(
@@ -495,8 +524,7 @@ def setup_corrupted_role(request, ansible_module):
             resource_type = {resource_type} WHERE name = {permission_name};'"'''
         )
         assert setup.values()[0]["rc"] == 0
-        teardown = ansible_module.command(f"hammer role delete --name {role_name}")
-        assert teardown.values()[0]["rc"] == 0
+        foreman.delete_role(role["id"])
 
     request.addfinalizer(teardown_corrupted_role)
 
@@ -1,14 +1,10 @@
 import pytest
 import yaml
 
+from testfm import constants
 from testfm.advanced import Advanced
 from testfm.advanced_by_tag import AdvancedByTag
-from testfm.constants import cap_beta_repo
-from testfm.constants import cap_repos
 from testfm.constants import fm_hammer_yml
-from testfm.constants import missing_beta_el8_repos
-from testfm.constants import sat_beta_repo
-from testfm.constants import sat_repos
 from testfm.decorators import stubbed
 from testfm.helpers import rhel7
 from testfm.helpers import server
@@ -392,7 +388,7 @@ def test_positive_satellite_repositories_setup(setup_subscribe_to_cdn_dogfood, a
         contacted = ansible_module.command("yum repolist")
         for result in contacted.values():
             logger.info(result["stdout"])
-            for repo in sat_repos[ver]:
+            for repo in constants.sat_repos[ver]:
                 assert repo in result["stdout"]
 
     # 6.12 till not GA
@@ -401,7 +397,7 @@ def test_positive_satellite_repositories_setup(setup_subscribe_to_cdn_dogfood, a
         logger.info(result["stdout"])
         assert "FAIL" in result["stdout"]
         assert result["rc"] == 1
-        for repo in sat_repos["6.12"]:
+        for repo in constants.sat_repos["6.12"]:
             assert repo in result["stdout"]
 
     # Verify that all required beta repositories gets enabled
@@ -414,18 +410,17 @@ def test_positive_satellite_repositories_setup(setup_subscribe_to_cdn_dogfood, a
         logger.info(result["stdout"])
         assert "FAIL" in result["stdout"]
         assert result["rc"] != 0
-        for repo in missing_beta_el8_repos:
+        for repo in constants.missing_beta_el8_repos:
             assert f"Error: '{repo}' does not match a valid repository ID" in result["stdout"]
 
     contacted = ansible_module.command("yum repolist")
     for result in contacted.values():
         logger.info(result["stdout"])
-        for repo in sat_beta_repo:
+        for repo in constants.sat_beta_repo:
             assert repo in result["stdout"]
 
 
 @pytest.mark.capsule
-@pytest.mark.skipif(server() == "satellite", reason="Test intended to run only on Capsule servers")
 def test_positive_capsule_repositories_setup(setup_subscribe_to_cdn_dogfood, ansible_module):
     """Verify that all required capsule repositories gets enabled.
 
@@ -443,6 +438,8 @@ def test_positive_capsule_repositories_setup(setup_subscribe_to_cdn_dogfood, ans
 
     :CaseImportance: Critical
     """
+    if server() == "satellite":
+        pytest.skip("Test intended to run only on Capsule servers")
     supported_versions = ["6.9", "6.10", "6.11"] if rhel7() else ["6.11"]
     for ver in supported_versions:
         contacted = ansible_module.command(Advanced.run_repositories_setup({"version": ver}))
@@ -453,7 +450,7 @@ def test_positive_capsule_repositories_setup(setup_subscribe_to_cdn_dogfood, ans
         contacted = ansible_module.command("yum repolist")
         for result in contacted.values():
             logger.info(result["stdout"])
-            for repo in cap_repos[ver]:
+            for repo in constants.cap_repos[ver]:
                 assert repo in result["stdout"]
 
     # 6.12 till not GA
@@ -462,7 +459,7 @@ def test_positive_capsule_repositories_setup(setup_subscribe_to_cdn_dogfood, ans
         logger.info(result["stdout"])
         assert "FAIL" in result["stdout"]
         assert result["rc"] == 1
-        for repo in cap_repos["6.12"]:
+        for repo in constants.cap_repos["6.12"]:
             assert repo in result["stdout"]
 
     # Verify that all required beta repositories gets enabled
@@ -475,10 +472,10 @@ def test_positive_capsule_repositories_setup(setup_subscribe_to_cdn_dogfood, ans
         logger.info(result["stdout"])
         assert "FAIL" in result["stdout"]
         assert result["rc"] != 0
-        for repo in missing_beta_el8_repos:
+        for repo in constants.missing_beta_el8_repos:
             assert f"Error: '{repo}' does not match a valid repository ID" in result["stdout"]
     contacted = ansible_module.command("yum repolist")
     for result in contacted.values():
         logger.info(result["stdout"])
-        for repo in cap_beta_repo:
+        for repo in constants.cap_beta_repo:
             assert repo in result["stdout"]
@@ -4,6 +4,7 @@ from fauxfactory import gen_string
 from testfm.backup import Backup
 from testfm.helpers import server
 from testfm.log import logger
+from testfm.parser import parse_output
 
 BACKUP_DIR = "/tmp/"
 NODIR_MSG = "ERROR: parameter 'BACKUP_DIR': no value provided"
@@ -61,7 +62,7 @@ def test_positive_backup_online(setup_backup_tests, ansible_module):
     contacted = ansible_module.command(Backup.run_online_backup(["-y", subdir]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     # getting created files
@@ -99,7 +100,7 @@ def test_positive_backup_online_skip_pulp_content(setup_backup_tests, ansible_mo
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     # getting created files
@@ -139,7 +140,7 @@ def test_positive_backup_online_preserve_directory(setup_backup_tests, ansible_m
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls -a {subdir}")
@@ -174,7 +175,7 @@ def test_positive_backup_online_split_pulp_tar(setup_backup_tests, ansible_modul
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls {subdir}")
@@ -212,7 +213,7 @@ def test_positive_backup_online_incremental(setup_backup_tests, ansible_module):
     setup = ansible_module.command(Backup.run_online_backup(["-y", subdir]))
     for result in setup.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
     contacted = ansible_module.command(f"ls {subdir}")
     source_dir = contacted.values()[0]["stdout_lines"][0]
@@ -221,7 +222,7 @@ def test_positive_backup_online_incremental(setup_backup_tests, ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.stat(path=subdir)
@@ -253,7 +254,7 @@ def test_positive_backup_online_caspule_features(setup_backup_tests, ansible_mod
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     # getting created files
@@ -291,7 +292,7 @@ def test_positive_backup_online_all(setup_backup_tests, ansible_module):
     setup = ansible_module.command(Backup.run_online_backup(["-y", subdir]))
     for result in setup.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
     contacted = ansible_module.command(f"ls {subdir}")
     source_dir = contacted.values()[0]["stdout_lines"][0]
@@ -307,7 +308,7 @@ def test_positive_backup_online_all(setup_backup_tests, ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -331,7 +332,7 @@ def test_positive_backup_offline(setup_backup_tests, ansible_module):
     contacted = ansible_module.command(Backup.run_offline_backup(["-y", subdir]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     # getting created files
@@ -366,7 +367,7 @@ def test_positive_backup_offline_skip_pulp_content(setup_backup_tests, ansible_m
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     # getting created files
@@ -404,7 +405,7 @@ def test_positive_backup_offline_preserve_directory(setup_backup_tests, ansible_
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls -a {subdir}")
@@ -437,7 +438,7 @@ def test_positive_backup_offline_split_pulp_tar(setup_backup_tests, ansible_modu
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls {subdir}")
@@ -472,7 +473,7 @@ def test_positive_backup_offline_incremental(setup_backup_tests, ansible_module)
     setup = ansible_module.command(Backup.run_offline_backup(["-y", subdir]))
     for result in setup.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
     contacted = ansible_module.command(f"ls {subdir}")
     source_dir = contacted.values()[0]["stdout_lines"][0]
@@ -481,7 +482,7 @@ def test_positive_backup_offline_incremental(setup_backup_tests, ansible_module)
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.stat(path=subdir)
@@ -514,7 +515,7 @@ def test_positive_backup_offline_capsule_features(setup_backup_tests, ansible_mo
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls {subdir}")
@@ -548,7 +549,7 @@ def test_positive_backup_offline_logical(setup_backup_tests, ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
     contacted = ansible_module.command(f"ls {subdir}")
@@ -587,7 +588,7 @@ def test_positive_backup_offline_all(setup_backup_tests, ansible_module):
     setup = ansible_module.command(Backup.run_offline_backup(["-y", subdir]))
     for result in setup.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
     contacted = ansible_module.command(f"ls {subdir}")
     source_dir = contacted.values()[0]["stdout_lines"][0]
@@ -604,7 +605,7 @@ def test_positive_backup_offline_all(setup_backup_tests, ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
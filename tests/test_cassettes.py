@@ -0,0 +1,76 @@
+import pytest
+
+from testfm.plugins import cassettes
+from testfm.plugins.cassettes import Cassette
+from testfm.plugins.cassettes import CassetteMiss
+
+SUBSCRIBE = 'subscription-manager register --username="rhn-user" --password="rhn-s3cret"'
+HAMMER = "hammer -u admin -p changeme user update --login admin --password 'admin-s3cret'"
+
+
+def test_positive_cassette_redacts_secrets(monkeypatch, tmp_path):
+    """Store cassette without credentials and replay it by the real commands
+
+    :id: 2e5690f6-6ff0-423d-9cee-97e2d36a5731
+
+    :setup:
+        1. Subscription credentials in the settings.
+
+    :steps:
+        1. Record commands passing the credentials and hammer passwords, whose
+           output repeats the user name.
+        2. Store the cassette, load it and replay the same commands.
+
+    :expectedresults: No secret is stored, replay returns the recorded results.
+
+    :CaseImportance: Medium
+    """
+    monkeypatch.setattr(
+        cassettes,
+        "settings",
+        {"subscription.rhn_username": "rhn-user", "subscription.rhn_password": "rhn-s3cret"},
+    )
+    path = tmp_path / "test.jsonl"
+    cassette = Cassette(path)
+    cassette.record("helpers", "run", [SUBSCRIBE], {"host": "sat"}, {"stdout": "rhn-user ok"})
+    cassette.record("ansible", "command", [HAMMER], {}, {"sat": {"rc": 0}})
+    cassette.save()
+    stored = path.read_text()
+    for secret in ("rhn-user", "rhn-s3cret", "changeme", "admin-s3cret"):
+        assert secret not in stored
+    assert "<subscription.rhn_password>" not in stored
+    assert "<subscription.rhn_username>" in stored
+    assert "--password=<password>" in stored
+    replayed = Cassette.load(path)
+    assert replayed.play("helpers", "run", [SUBSCRIBE], {"host": "sat"}) == {
+        "stdout": "<subscription.rhn_username> ok"
+    }
+    assert replayed.play("ansible", "command", [HAMMER], {}) == {"sat": {"rc": 0}}
+
+
+def test_positive_cassette_replays_same_shape_only():
+    """Replay changed command only by a recorded one of the same shape
+
+    :id: 4852ec50-3e1a-4f8f-ba46-4d9b2612d211
+
+    :setup:
+        1. Cassette with two recorded commands.
+
+    :steps:
+        1. Replay the first command with another random name.
+        2. Replay a command of another program.
+
+    :expectedresults: The renamed command gets the recorded result, the other
+        program raises CassetteMiss instead of getting an unrelated result.
+
+    :CaseImportance: Medium
+    """
+    cassette = Cassette(None)
+    cassette.record("helpers", "run", ["hammer role create --name abc"], {"host": "sat"}, "role")
+    cassette.record("helpers", "run", ["rpm -q satellite"], {"host": "sat"}, "rpm")
+    renamed = cassette.play("helpers", "run", ["hammer role create --name xyz"], {"host": "sat"})
+    assert renamed == "role"
+    with pytest.raises(CassetteMiss, match="cat /etc/hosts"):
+        cassette.play("helpers", "run", ["cat /etc/hosts"], {"host": "sat"})
+    with pytest.raises(CassetteMiss):
+        cassette.play("helpers", "run", ["hammer role create --name a --description b"], {})
@@ -0,0 +1,80 @@
+import warnings
+
+import pytest
+
+from testfm import cache
+from testfm import catalog
+from testfm import facts
+from testfm import settings
+from testfm.catalog import CatalogWarning
+from testfm.facts import HostFacts
+from testfm.hosts import hosts
+
+FOREMAN_MAINTAIN = "rubygem-foreman_maintain-1.5.1-1.el8sat.noarch"
+
+
+@pytest.fixture
+def expired_facts(monkeypatch, tmp_path):
+    """Local cache with facts of the server older than their TTL, no host involved"""
+    cache_dir, ttl = settings.get("cache.dir"), settings.get("facts.ttl")
+    settings.set("cache.dir", str(tmp_path))
+    settings.set("facts.ttl", 0)
+    monkeypatch.setattr(facts, "_memo", {})
+    monkeypatch.setattr(facts, "_unverified", set())
+    host = hosts("server")[0]
+    cache.dump(
+        facts._cache_entry(host),
+        HostFacts(host, "satellite", "6.15.0", 8, FOREMAN_MAINTAIN, "boot")._asdict(),
+    )
+    yield host
+    settings.set("cache.dir", cache_dir)
+    settings.set("facts.ttl", ttl)
+
+
+def test_positive_catalog_tags_after_facts_expired(expired_facts):
+    """Read tags of the cached catalog after the cached facts expired
+
+    :id: 12510726-034c-46e1-8b23-6ff5d7afacd4
+
+    :setup:
+        1. Catalog cached for the installed foreman_maintain.
+        2. Cached facts of the server older than facts.ttl.
+
+    :steps:
+        1. Read tags of the catalog.
+
+    :expectedresults: Tags of the cached catalog are returned without warning.
+
+    :CaseImportance: Medium
+    """
+    cache.dump(
+        catalog._cache_entry(FOREMAN_MAINTAIN),
+        {
+            "checks": [["server-ping", "Check whether all services are running", ["default"]]],
+            "tags": ["default", "pre-upgrade", "backup"],
+        },
+    )
+    assert facts.cached() is None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert catalog.tags() == ["default", "pre-upgrade", "backup"]
+    assert catalog.load().labels == ["server-ping"]
+
+
+def test_negative_catalog_tags_not_cached(expired_facts):
+    """Fall back to default tags when no catalog is cached
+
+    :id: 43c8f60b-ca43-4a30-a54b-65d641626558
+
+    :setup:
+        1. Cached facts of the server, no catalog.
+
+    :steps:
+        1. Read tags of the catalog.
+
+    :expectedresults: Default tags are returned with a CatalogWarning.
+
+    :CaseImportance: Medium
+    """
+    with pytest.warns(CatalogWarning, match="--refresh-catalog"):
+        assert catalog.tags() == list(catalog.DEFAULT_TAGS)
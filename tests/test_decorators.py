@@ -0,0 +1,115 @@
+import pytest
+
+from testfm import decorators
+from testfm.decorators import apply_version_gates
+from testfm.decorators import version_tuple
+
+
+class Item:
+    """Collected test item carrying version markers, as seen by apply_version_gates"""
+
+    def __init__(self, *marks):
+        self.nodeid = "tests/test_gated.py::test_gated"
+        self.marks = list(marks)
+
+    def get_closest_marker(self, name):
+        return next(self.iter_markers(name), None)
+
+    def iter_markers(self, name):
+        return (mark for mark in self.marks if mark.name == name)
+
+    def add_marker(self, marker):
+        self.marks.append(marker.mark)
+
+    @property
+    def skipped(self):
+        return any(mark.name == "skip" for mark in self.marks)
+
+
+@pytest.fixture
+def server_version(monkeypatch):
+    """Set x.y version of the server the gates are resolved against"""
+    monkeypatch.setattr(decorators, "server", lambda: "satellite")
+
+    def set_version(version):
+        monkeypatch.setattr(decorators, "product", lambda: version)
+
+    return set_version
+
+
+def test_positive_version_tuple_order():
+    """Compare x.y versions numerically
+
+    :id: 7fcb2ed9-a672-43c4-ae3d-f05852551455
+
+    :steps:
+        1. Convert '6.10', '6.9' and '6.10.1' with version_tuple.
+
+    :expectedresults: '6.10' sorts above '6.9', parts after x.y are ignored.
+
+    :CaseImportance: Medium
+    """
+    assert version_tuple("6.10") > version_tuple("6.9")
+    assert version_tuple("6.10.1") == (6, 10)
+
+
+def test_negative_version_tuple_float():
+    """Reject versions which are not strings
+
+    :id: 1a546ec6-a364-42ca-8caf-7a6e98a5a063
+
+    :steps:
+        1. Convert float 6.10 with version_tuple.
+
+    :expectedresults: TypeError tells to use a string.
+
+    :CaseImportance: Medium
+    """
+    with pytest.raises(TypeError, match="string"):
+        version_tuple(6.10)
+
+
+def test_positive_apply_version_gates(server_version):
+    """Skip gated tests on versions out of their range
+
+    :id: 5cf0f344-a03e-4677-9103-2be6e443cc5d
+
+    :steps:
+        1. Apply version gates of starts_in, ends_in and run_only_on markers
+           with server version 6.10.
+
+    :expectedresults: Only tests whose markers exclude 6.10 are skipped.
+
+    :CaseImportance: Medium
+    """
+    server_version("6.10")
+    runs = [
+        Item(pytest.mark.starts_in("6.9").mark),
+        Item(pytest.mark.ends_in("6.10").mark),
+        Item(pytest.mark.run_only_on("6.9", "6.10").mark),
+    ]
+    skips = [
+        Item(pytest.mark.starts_in("6.11").mark),
+        Item(pytest.mark.ends_in("6.9").mark),
+        Item(pytest.mark.run_only_on("6.1").mark),
+    ]
+    apply_version_gates(runs + skips)
+    assert [item.skipped for item in runs] == [False, False, False]
+    assert [item.skipped for item in skips] == [True, True, True]
+
+
+def test_negative_apply_version_gates_float_marker(server_version):
+    """Reject float version in a marker at collection time
+
+    :id: 3bc9679d-7518-4b61-9a1b-90da26cfffc3
+
+    :steps:
+        1. Apply version gates to a test marked with starts_in(6.10).
+
+    :expectedresults: Usage error names the test.
+
+    :CaseImportance: Medium
+    """
+    server_version("6.10")
+    with pytest.raises(pytest.UsageError, match="tests/test_gated.py::test_gated"):
+        apply_version_gates([Item(pytest.mark.starts_in(6.10).mark)])
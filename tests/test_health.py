@@ -1,10 +1,13 @@
-import time
-
 import pytest
 
 from testfm.decorators import stubbed
 from testfm.health import Health
+from testfm.helpers import run
+from testfm.helpers import wait_until
 from testfm.log import logger
+from testfm.parser import FAIL
+from testfm.parser import OK
+from testfm.parser import parse_output
 
 
 @pytest.mark.capsule
@@ -95,11 +98,11 @@ def test_positive_satellite_maintain_health_check(ansible_module):
         logger.info(result["stdout"])
         assert result["rc"] == 0
         if "paused tasks in the system" not in result["stdout"]:
-            assert "FAIL" not in result["stdout"]
+            assert parse_output(result["stdout"]).ok
 
 
 @pytest.mark.capsule
-def test_positive_satellite_maintain_health_check_by_tags(ansible_module):
+def test_positive_satellite_maintain_health_check_by_tags(health_tag, ansible_module):
     """Verify satellite-maintain health check by tags
 
     :id: 518e19af-2dd4-4fb0-8c90-208cbd354107
@@ -108,25 +111,21 @@ def test_positive_satellite_maintain_health_check_by_tags(ansible_module):
         1. satellite-maintain should be installed.
 
     :steps:
-        1. Run satellite-maintain health check --tags tag_name
+        1. Run satellite-maintain health check --tags tag_name for every tag
+           of the cached label catalog, see :mod:`testfm.catalog`
 
     :expectedresults: Health check should perform.
 
     :CaseImportance: Critical
     """
-    contacted = ansible_module.command(Health.list_tags())
+    contacted = ansible_module.command(Health.check(["--tags", health_tag, "--assumeyes"]))
     for result in contacted.values():
-        output = result["stdout"]
-    output = [i.split("]\x1b[0m")[0] for i in output.split("\x1b[36m[") if i]
-    for tag in output:
-        contacted = ansible_module.command(Health.check(["--tags", tag, "--assumeyes"]))
-        for result in contacted.values():
-            logger.info(result["stdout"])
-            assert "FAIL" not in result["stdout"]
-            assert result["rc"] == 0
+        logger.info(result["stdout"])
+        assert parse_output(result["stdout"]).ok
+        assert result["rc"] == 0
 
 
-def test_positive_check_server_ping(ansible_module):
+def test_positive_check_server_ping(health_checks):
     """Verify server ping check
 
     :id: b1eec8cb-9f94-439a-b5e7-8621cb35501f
@@ -141,10 +140,10 @@ def test_positive_check_server_ping(ansible_module):
 
     :CaseImportance: Critical
     """
-    contacted = ansible_module.command(Health.check({"label": "server-ping"}))
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+    check = health_checks["server-ping"]
+    logger.info(check.step)
+    assert check.step.status == OK
+    assert check.rc == 0
 
 
 def test_negative_check_server_ping(setup_katello_service_stop, ansible_module):
@@ -167,7 +166,7 @@ def test_negative_check_server_ping(setup_katello_service_stop, ansible_module):
     contacted = ansible_module.command(Health.check(["--label", "server-ping", "--assumeyes"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
 
 
 @pytest.mark.capsule
@@ -186,10 +185,10 @@ def test_positive_pre_upgrade_health_check(ansible_module):
 
     :CaseImportance: Critical
     """
-    contacted = ansible_module.command(Health.check({"tag": "pre-upgrade"}))
+    contacted = ansible_module.command(Health.check({"tags": "pre-upgrade"}))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
 
 
 @pytest.mark.capsule
@@ -213,12 +212,12 @@ def test_positive_check_upstream_repository(setup_upstream_repository, ansible_m
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
 @pytest.mark.capsule
-def test_positive_available_space(ansible_module):
+def test_positive_available_space(health_checks):
     """Verify available-space check
 
     :id: 7d8798ca-3334-4dda-a9b0-dc3d7c0903e9
@@ -233,14 +232,13 @@ def test_positive_available_space(ansible_module):
 
     :CaseImportance: Critical
     """
-    contacted = ansible_module.command(Health.check({"label": "available-space"}))
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
-        assert result["rc"] == 0
+    check = health_checks["available-space"]
+    logger.info(check.step)
+    assert check.step.status == OK
+    assert check.rc == 0
 
 
-def test_positive_available_space_candlepin(ansible_module):
+def test_positive_available_space_candlepin(health_checks):
     """Verify available-space-cp check
 
     :id: 382a2bf3-a3da-4e46-b370-a443450f93b7
@@ -255,11 +253,10 @@ def test_positive_available_space_candlepin(ansible_module):
 
     :CaseImportance: Medium
     """
-    contacted = ansible_module.command(Health.check({"label": "available-space-cp"}))
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
-        assert result["rc"] == 0
+    check = health_checks["available-space-cp"]
+    logger.info(check.step)
+    assert check.step.status == OK
+    assert check.rc == 0
 
 
 def test_positive_automate_bz1632768(setup_hammer_defaults, ansible_module):
@@ -285,7 +282,7 @@ def test_positive_automate_bz1632768(setup_hammer_defaults, ansible_module):
     contacted = ansible_module.command(Health.check(["--assumeyes"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -311,7 +308,7 @@ def test_positive_puppet_check_no_empty_cert_requests(ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -340,7 +337,7 @@ def test_positive_puppet_check_empty_cert_requests(setup_puppet_empty_cert, ansi
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 0
     puppet_ssldir_path = ansible_module.command("puppet config print ssldir").values()[0]["stdout"]
     contacted = ansible_module.find(
@@ -443,7 +440,7 @@ def test_positive_check_validate_yum_config(ansible_module):
     contacted = ansible_module.command(Health.check({"label": "validate-yum-config"}))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -471,7 +468,7 @@ def test_positive_check_epel_repository(setup_epel_repository, ansible_module):
     for result in contacted.values():
         logger.info(result["stdout"])
         assert "System is subscribed to non Red Hat repositories" in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 1
 
 
@@ -502,7 +499,7 @@ def test_positive_check_epel_repository_with_invalid_repo(
     for result in contacted.values():
         logger.info(result["stdout"])
         assert "System is subscribed to non Red Hat repositories" in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 1
 
 
@@ -534,19 +531,19 @@ def test_positive_check_old_foreman_tasks(setup_old_foreman_tasks, ansible_modul
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 0
         assert error_message in result["stdout"]
         assert delete_message in result["stdout"]
     contacted = ansible_module.command(Health.check(["--label", "check-old-foreman-tasks"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
 @pytest.mark.capsule
-def test_positive_check_tmout_variable(ansible_module):
+def test_positive_check_tmout_variable(health_checks, ansible_module):
     """Verify check-tmout-variable. Upstream issue #23430.
 
     :id: e0eea928-0ffb-4692-adb9-fc4bf041f301
@@ -571,17 +568,16 @@ def test_positive_check_tmout_variable(ansible_module):
         "The TMOUT environment variable is set with value 100. "
         "Run 'unset TMOUT' command to unset this variable."
     )
-    # Run check without setting TMOUT environment variable.
-    contacted = ansible_module.command(Health.check({"label": "check-tmout-variable"}))
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
-        assert result["rc"] == 0
+    # Check run without setting TMOUT environment variable.
+    check = health_checks["check-tmout-variable"]
+    logger.info(check.step)
+    assert check.step.status == OK
+    assert check.rc == 0
     # Run check with TMOUT environment variable set.
     contacted = ansible_module.shell(export + Health.check({"label": "check-tmout-variable"}))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert error_message in result["stdout"]
         assert result["rc"] == 1
 
@@ -617,7 +613,9 @@ def test_positive_check_tftp_storage(ansible_module, setup_tftp_storage):
     for file in files[:3]:
         setup = ansible_module.file(path=f"/var/lib/tftpboot/boot/{file}", state="touch")
         assert setup.values()[0]["changed"] == 1
-    time.sleep(200)
+    # wait until the files get older than token_duration of 2 minutes set by setup_tftp_storage
+    aged = "find /var/lib/tftpboot/boot -maxdepth 1 -mmin +2 -name 'foreman-discovery-*'"
+    wait_until(lambda: len(run(aged).stdout.split()) == 2, timeout=300)
     setup = ansible_module.file(path=f"/var/lib/tftpboot/boot/{files[-1]}", state="touch")
     assert setup.values()[0]["changed"] == 1
     # Run check-tftp-storage check.
@@ -628,7 +626,7 @@ def test_positive_check_tftp_storage(ansible_module, setup_tftp_storage):
         logger.info(result["stdout"])
         assert "There are old initrd and vmlinuz files present in tftp" in result["stdout"]
         assert "Rerunning the check after fix procedure" in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 0
     # check whether expected files are deleted
     for file in files[:2]:
@@ -643,7 +641,7 @@ def test_positive_check_tftp_storage(ansible_module, setup_tftp_storage):
     contacted = ansible_module.command(Health.check(["--label", "check-tftp-storage"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -691,7 +689,7 @@ def test_positive_check_postgresql_checkpoint_segments(ansible_module):
     for result in contacted.values():
         logger.info(result["stdout"])
         assert f"File {custom_hiera} is not a yaml file." in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 1
     # Make yaml file valid
     ansible_module.lineinfile(
@@ -713,7 +711,7 @@ def test_positive_check_postgresql_checkpoint_segments(ansible_module):
         logger.info(result["stdout"])
         assert "ERROR: 'postgresql::server::config_entries' cannot be null." in result["stdout"]
         assert "Please remove it from following file and re-run the command." in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 1
     # Add checkpoint_segments
     ansible_module.blockinfile(
@@ -728,7 +726,7 @@ def test_positive_check_postgresql_checkpoint_segments(ansible_module):
         logger.info(result["stdout"])
         assert "ERROR: Tuning option 'checkpoint_segments' found." in result["stdout"]
         assert "Please remove it from following file and re-run the command." in result["stdout"]
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 1
     # Remove config_entries section
     ansible_module.blockinfile(
@@ -742,12 +740,12 @@ def test_positive_check_postgresql_checkpoint_segments(ansible_module):
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
 @pytest.mark.capsule
-def test_positive_check_env_proxy(ansible_module):
+def test_positive_check_env_proxy(health_checks, ansible_module):
     """Verify env-proxy.
 
     :id: f8c44b40-3ce5-4179-8d6b-1156c0032450
@@ -772,16 +770,15 @@ def test_positive_check_env_proxy(ansible_module):
     contacted = ansible_module.shell(export + Health.check({"label": "env-proxy"}))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert error_message in result["stdout"]
         assert result["rc"] == 1
 
-    # Run check without setting HTTP_PROXY environment variable.
-    contacted = ansible_module.command(Health.check({"label": "env-proxy"}))
-    for result in contacted.values():
-        logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
-        assert result["rc"] == 0
+    # Check run without setting HTTP_PROXY environment variable.
+    check = health_checks["env-proxy"]
+    logger.info(check.step)
+    assert check.step.status == OK
+    assert check.rc == 0
 
 
 @stubbed
@@ -874,7 +871,7 @@ def test_positive_corrupted_roles(ansible_module, setup_corrupted_role):
     contacted = ansible_module.command(Health.check(["--label", "corrupted-roles", "--assumeyes"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert result["rc"] == 0
     # Verify corrupted roles are fixed and new filter is created for updated resource_type.
     contacted = ansible_module.shell(
@@ -965,12 +962,12 @@ def test_positive_check_duplicate_permissions(ansible_module, setup_duplicate_pe
     )
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" in result["stdout"]
+        assert any(step.status == FAIL for step in parse_output(result["stdout"]).steps)
         assert "Remove duplicate permissions from database" in result["stdout"]
         assert result["rc"] == 0
     # Verify the check passed
     contacted = ansible_module.command(Health.check(["--label", "duplicate-permissions"]))
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
@@ -0,0 +1,160 @@
+import datetime
+
+import pytest
+from fauxfactory import gen_string
+
+from testfm import foreman
+from testfm import helpers
+from testfm import settings
+from testfm.executor import add_listener
+from testfm.executor import AgentExecutor
+from testfm.executor import remove_listener
+from testfm.executor import SimulatorExecutor
+from testfm.foreman import Foreman
+from testfm.foreman_simulator import ForemanSimulator
+from testfm.helpers import run_batch
+from testfm.helpers import run_health_checks
+from testfm.hosts import hosts
+from testfm.parser import FAIL
+from testfm.parser import OK
+from testfm.plugins import cassettes
+from testfm.plugins.cassettes import Cassette
+from testfm.plugins.cassettes import CassetteExecutor
+from testfm.plugins.cassettes import Deck
+from testfm.simulator import simulator_for
+
+
+@pytest.mark.capsule
+def test_positive_run_batch_output_without_newline():
+    """Split output of batched commands which print no trailing newline
+
+    :id: 5ba295ab-ba08-44b8-8bab-de5043aff620
+
+    :setup:
+        1. A shell on the server.
+
+    :steps:
+        1. Run commands printing to stdout and stderr without trailing newline
+           in one run_batch call.
+
+    :expectedresults: Every command gets exactly its own stdout, stderr and rc.
+
+    :CaseImportance: Medium
+    """
+    first, second, third = run_batch(
+        [
+            "printf out1; printf err1 >&2",
+            "printf out2; printf err2 >&2; exit 3",
+            "printf 'out3\\n\\n'; printf 'err3\\n\\n' >&2",
+        ]
+    )
+    assert (first.rc, first.stdout, first.stderr) == (0, "out1", "err1")
+    assert (second.rc, second.stdout, second.stderr) == (3, "out2", "err2")
+    assert (third.rc, third.stdout, third.stderr) == (0, "out3", "err3")
+
+
+@pytest.mark.capsule
+def test_negative_agent_missing_binary():
+    """Run argument list of a missing binary through the agent backend
+
+    :id: 1965c971-cca2-4b07-bb61-3caab6e48bd9
+
+    :setup:
+        1. python3 on the server.
+
+    :steps:
+        1. Run an argument list whose binary does not exist with the agent.
+        2. Run another command with the same agent.
+
+    :expectedresults: The first command fails with rc 127 and the error on
+        stderr, the agent keeps serving commands.
+
+    :CaseImportance: Medium
+    """
+    agent = AgentExecutor(hosts()[0], user=settings.get("executor.user", "root"))
+    try:
+        missing = agent.run(["/nonexistent/testfm-missing"])
+        after = agent.run(["true"])
+    finally:
+        agent.close()
+    assert missing.rc == 127
+    assert "testfm-missing" in missing.stderr
+    assert after.rc == 0
+
+
+def test_positive_run_health_checks_one_label_per_run(monkeypatch):
+    """Run health checks one by one where --label takes a single label
+
+    :id: 26e3e859-81e8-4742-8464-8022cd769189
+
+    :setup:
+        1. Simulated satellite-maintain not taking comma-separated labels.
+
+    :steps:
+        1. Run a passing, a failing and an unknown check with run_health_checks.
+
+    :expectedresults: Every known check gets its own step and rc, the unknown
+        one raises an error naming it.
+
+    :CaseImportance: Medium
+    """
+    monkeypatch.setattr(helpers, "get_executor", SimulatorExecutor)
+    simulator = simulator_for("older-satellite")
+    simulator.multiple_labels = False
+    simulator.failing.add("env-proxy")
+    checks = run_health_checks(
+        ["server-ping", "env-proxy", "no-such-check"], host="older-satellite"
+    )
+    assert checks["server-ping"].step.status == OK
+    assert checks["server-ping"].rc == 0
+    assert checks["env-proxy"].step.status == FAIL
+    assert checks["env-proxy"].rc == 1
+    with pytest.raises(KeyError, match="no-such-check"):
+        checks["no-such-check"]
+
+
+def test_positive_replay_sync_plan_requests(monkeypatch):
+    """Replay Foreman requests of setup_sync_plan without Foreman
+
+    :id: 0c5d3a8e-6f49-4f7b-9a2e-2d8c41b7e915
+
+    :setup:
+        1. Local Foreman stand-in.
+
+    :steps:
+        1. Record creation of a sync plan and the listing of enabled sync plans
+           the way setup_sync_plan makes them.
+        2. Stop the stand-in and replay the requests with another plan name,
+           another date and no credentials.
+
+    :expectedresults: Replayed requests return the recorded sync plans.
+
+    :CaseImportance: Medium
+    """
+
+    def sync_plan(client):
+        client.create_sync_plan(
+            1, gen_string("alpha"), interval="weekly", sync_date=datetime.datetime.now().isoformat()
+        )
+        return [plan["id"] for plan in client.enabled_sync_plans()]
+
+    deck = Deck()
+    deck.mode = "record"
+    deck.test = "setup_sync_plan"
+    monkeypatch.setattr(cassettes, "deck", deck)
+    add_listener(deck.on_command)
+    try:
+        with ForemanSimulator() as simulator:
+            recorded = sync_plan(Foreman(simulator.url, username="admin", password="secret"))
+    finally:
+        remove_listener(deck.on_command)
+    calls = deck.cassette().calls
+    assert [call["args"][0][:3] for call in calls] == [
+        ["foreman-api", "POST", "/katello/api/v2/organizations/1/sync_plans"],
+        ["foreman-api", "GET", "/api/v2/organizations"],
+        ["foreman-api", "GET", "/katello/api/v2/organizations/1/sync_plans"],
+    ]
+    deck.mode = "replay"
+    deck.cassettes = {"setup_sync_plan": Cassette(None, calls)}
+    monkeypatch.setattr(foreman, "get_executor", CassetteExecutor)
+    assert sync_plan(Foreman(simulator.url, username=None, password=None)) == recorded
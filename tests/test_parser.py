@@ -0,0 +1,96 @@
+from testfm.parser import FAIL
+from testfm.parser import OK
+from testfm.parser import parse_output
+from testfm.parser import Step
+from testfm.parser import StepParser
+
+SEPARATOR = "-" * 80
+OUTPUT = (
+    "Running ForemanMaintain::Scenario::FilteredScenario\n"
+    f"{'=' * 80}\n"
+    "Check whether all services are running:                        \x1b[32m[OK]\x1b[0m\n"
+    f"{SEPARATOR}\n"
+    "Check for paused tasks: \\ checking\r"
+    "Check for paused tasks:                                      \x1b[1;31m[FAIL]\x1b[0m\n"
+    "There are currently 1 paused tasks in the system\n"
+    "Resume them with foreman-tasks-resume\n"
+    f"{SEPARATOR}\n"
+    "Scenario [ForemanMaintain::Scenario::FilteredScenario] failed.\n"
+    "\n"
+    "The following steps ended up in failing state:\n"
+    "\n"
+    "  [foreman-tasks-not-paused]\n"
+)
+STEPS = [
+    Step("Check whether all services are running", OK, ""),
+    Step(
+        "Check for paused tasks",
+        FAIL,
+        "There are currently 1 paused tasks in the system\nResume them with foreman-tasks-resume",
+    ),
+]
+
+
+def test_positive_parse_output():
+    """Parse steps, their status, messages and failed labels of a whole run
+
+    :id: eba2d6d8-e99c-4a0d-bb90-870d88d41729
+
+    :steps:
+        1. Parse colored output of a run with a passing and a failing step,
+           the failing one redrawn by a spinner.
+
+    :expectedresults: Every step gets its description, status and message,
+        the failed label is listed and the scenario is not ok.
+
+    :CaseImportance: Medium
+    """
+    scenario = parse_output(OUTPUT)
+    assert scenario.steps == STEPS
+    assert scenario.failed == ["foreman-tasks-not-paused"]
+    assert scenario.warning == []
+    assert scenario.step("Check for paused").status == FAIL
+    assert not scenario.ok
+
+
+def test_positive_parse_split_chunks():
+    """Parse output fed in chunks split inside lines and ANSI escapes
+
+    :id: 420e5b15-0d3b-4853-ae49-10e4cf3261d1
+
+    :steps:
+        1. Feed the output to StepParser in chunks of every size from 1 to 40
+           characters, so lines and escape sequences are cut at every offset.
+
+    :expectedresults: Steps and failed labels equal those parsed from the
+        whole output at once.
+
+    :CaseImportance: Medium
+    """
+    for size in range(1, 41):
+        parser = StepParser()
+        steps = []
+        for start in range(0, len(OUTPUT), size):
+            end = start + size
+            steps += parser.feed(OUTPUT[start:end])
+        steps += parser.close()
+        assert steps == STEPS, f"chunks of {size}"
+        assert parser.failed == ["foreman-tasks-not-paused"], f"chunks of {size}"
+
+
+def test_negative_parse_output_without_steps():
+    """Parse output which has no step at all
+
+    :id: 8c1f5a27-3d4e-4b09-b6a2-51e7c9d0f3a4
+
+    :steps:
+        1. Parse empty output and output of an error message.
+
+    :expectedresults: No steps are parsed and the scenario is not ok.
+
+    :CaseImportance: Medium
+    """
+    for output in ("", "ERROR: Unrecognised option '--tag'\n\nSee: 'satellite-maintain --help'"):
+        scenario = parse_output(output)
+        assert scenario.steps == []
+        assert not scenario.ok
@@ -0,0 +1,74 @@
+import warnings
+
+import pytest
+
+from testfm import schema
+from testfm.facts import HostFacts
+from testfm.health import Health
+from testfm.schema import CommandOptionError
+from testfm.schema import parse_help
+
+FOREMAN_MAINTAIN = "rubygem-foreman_maintain-1.5.1-1.el8sat.noarch"
+HEALTH_CHECK_HELP = """Usage:
+    satellite-maintain health check [OPTIONS]
+
+Options:
+    --label label                 Limit only for a specific label.
+    --tags tags                   Limit only for specific set of labels.
+                                  (comma-separated list)
+    -y, --assumeyes               Automatically answer yes for all questions
+    -w, --whitelist whitelist     Comma-separated list of labels of steps
+                                  to be ignored
+    -f, --force                   Force steps that would be skipped as they
+                                  were already run
+    -h, --help                    print help
+"""
+
+
+@pytest.fixture
+def cached_schema(monkeypatch):
+    """Schema of health check cached for the installed foreman_maintain, no host involved"""
+    facts = HostFacts("satellite", "satellite", "6.15.0", 8, FOREMAN_MAINTAIN, "boot")
+    monkeypatch.setattr(schema, "cached", lambda: facts)
+    command, options = parse_help(HEALTH_CHECK_HELP)
+    monkeypatch.setitem(schema._schemas, FOREMAN_MAINTAIN, {command: options})
+
+
+def test_negative_validate_renamed_option(cached_schema):
+    """Reject option the cached --help of the command does not list
+
+    :id: f83c9263-6d2b-4a68-9de6-7069c58c9f8f
+
+    :setup:
+        1. Cached schema of satellite-maintain health check.
+
+    :steps:
+        1. Build health check with the old tag option.
+
+    :expectedresults: CommandOptionError names the unknown --tag option.
+
+    :CaseImportance: Medium
+    """
+    with pytest.raises(CommandOptionError, match="has no option --tag$"):
+        Health.check(options={"tag": "pre-upgrade"})
+
+
+def test_positive_validate_option(cached_schema):
+    """Accept option listed in the cached --help of the command
+
+    :id: 1a55992d-a09f-4d65-bd55-8539eb1e4d59
+
+    :setup:
+        1. Cached schema of satellite-maintain health check.
+
+    :steps:
+        1. Build health check with the tags option.
+
+    :expectedresults: Command is built without error or warning.
+
+    :CaseImportance: Medium
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        command = Health.check(options={"tags": "pre-upgrade", "assumeyes": True})
+    assert str(command) == 'satellite-maintain health check --tags="pre-upgrade" --assumeyes'
@@ -2,6 +2,7 @@ import pytest
 
 from testfm.health import Health
 from testfm.log import logger
+from testfm.parser import parse_output
 from testfm.service import Service
 
 
@@ -24,7 +25,7 @@ def test_positive_satellite_maintain_service_restart(ansible_module):
     contacted = ansible_module.command(Service.service_restart())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -47,7 +48,7 @@ def test_positive_satellite_maintain_service_start(ansible_module):
     contacted = ansible_module.command(Service.service_start())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -72,7 +73,7 @@ def test_positive_foreman_service(ansible_module):
         setup = ansible_module.command(Service.service_stop({"only": "foreman"}))
         for result in setup.values():
             assert result["rc"] == 0
-            assert "FAIL" not in result["stdout"]
+            assert parse_output(result["stdout"]).ok
             assert "foreman" in result["stdout"]
 
         httpd_service = ansible_module.command(Service.service_status({"only": "httpd"}))
@@ -111,7 +112,7 @@ def test_positive_service_enable(ansible_module):
     contacted = ansible_module.command(Service.service_enable())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -135,7 +136,7 @@ def test_positive_service_disable(ansible_module):
         contacted = ansible_module.command(Service.service_disable())
         for result in contacted.values():
             logger.info(result["stdout"])
-            assert "FAIL" not in result["stdout"]
+            assert parse_output(result["stdout"]).ok
             assert result["rc"] == 0
     finally:
         teardown = ansible_module.command(Service.service_enable())
@@ -164,12 +165,12 @@ def test_positive_automate_bz1626651(ansible_module):
         contacted = ansible_module.command(Service.service_stop())
         for result in contacted.values():
             logger.info(result["stdout"])
-            assert "FAIL" not in result["stdout"]
+            assert parse_output(result["stdout"]).ok
             assert result["rc"] == 0
         contacted = ansible_module.command(Service.service_restart())
         for result in contacted.values():
             logger.info(result["stdout"])
-            assert "FAIL" not in result["stdout"]
+            assert parse_output(result["stdout"]).ok
             assert result["rc"] == 0
     finally:
         teardown = ansible_module.command(Service.service_start())
@@ -253,7 +254,7 @@ def test_positive_fm_service_restart_bz_1696862(setup_bz_1696862, ansible_module
     contacted = ansible_module.command(Service.service_restart())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
 
 
@@ -276,14 +277,14 @@ def test_positive_satellite_maintain_service_list_sidekiq(ansible_module):
     contacted = ansible_module.command(Service.service_list())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
         assert "dynflow-sidekiq@.service" in result["stdout"]
 
     contacted = ansible_module.command(Service.service_restart())
     for result in contacted.values():
         logger.info(result["stdout"])
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
         assert "dynflow-sidekiq@orchestrator" in result["stdout"]
         assert "dynflow-sidekiq@worker" in result["stdout"]
@@ -316,5 +317,5 @@ def test_positive_service_status_rpmsave(ansible_module, setup_rpmsave_file):
     for result in contacted.values():
         logger.info(result["stdout"])
         assert "rpmsave" not in result["stdout"]
-        assert "FAIL" not in result["stdout"]
+        assert parse_output(result["stdout"]).ok
         assert result["rc"] == 0
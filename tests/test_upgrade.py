@@ -23,34 +23,17 @@ def test_positive_satellite_maintain_upgrade_list(ansible_module):
 
     :CaseImportance: Critical
     """
-    if server() == "satellite":
-        satellite_version = ansible_module.command(
-            "rpm -q 'satellite' --queryformat='%{VERSION}'"
-        ).values()[0]["stdout"]
-        if satellite_version.startswith("6.12"):
-            versions = ["6.12.z"]
-        elif satellite_version.startswith("6.11"):
-            versions = ["6.11.z", "6.12"]
-        elif satellite_version.startswith("6.10"):
-            versions = ["6.10.z", "6.11"]
-        elif satellite_version.startswith("6.9"):
-            versions = ["6.9.z", "6.10"]
-        else:
-            versions = ["unsupported satellite version"]
+    server_version = product()
+    if server_version.startswith("6.12"):
+        versions = ["6.12.z"]
+    elif server_version.startswith("6.11"):
+        versions = ["6.11.z", "6.12"]
+    elif server_version.startswith("6.10"):
+        versions = ["6.10.z", "6.11"]
+    elif server_version.startswith("6.9"):
+        versions = ["6.9.z", "6.10"]
     else:
-        capsule_version = ansible_module.command(
-            "rpm -q 'satellite-capsule' --queryformat='%{VERSION}'"
-        ).values()[0]["stdout"]
-        if capsule_version.startswith("6.12"):
-            versions = ["6.12.z"]
-        elif capsule_version.startswith("6.11"):
-            versions = ["6.11.z", "6.12"]
-        elif capsule_version.startswith("6.10"):
-            versions = ["6.10.z", "6.11"]
-        elif capsule_version.startswith("6.9"):
-            versions = ["6.9.z", "6.10"]
-        else:
-            versions = ["unsupported capsule version"]
+        versions = [f"unsupported {server()} version"]
 
     contacted = ansible_module.command(Upgrade.list_versions())
     for result in contacted.values():